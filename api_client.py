@@ -0,0 +1,111 @@
+import base64
+
+from instrumentation import count, timed
+
+DEFAULT_API_BASE_URL = "http://localhost:3000"
+
+# Antworten, bei denen auf das alte JSON/Base64-Format zurückgefallen wird
+LEGACY_UPLOAD_STATUS_CODES = (404, 405, 415)
+# (Verbindungsaufbau, Lesen) in s; kürzer als DIRECT_ATTEMPT_GRACE der Outbox,
+# damit ein hängender Upload nicht parallel zur Wiederholung weiterläuft
+UPLOAD_TIMEOUT = (10, 30)
+
+
+def training_url(api_base_url, training_id):
+    return f"{api_base_url}/api/Vatsim/traineemanager/training/{training_id}"
+
+
+def idempotency_headers(idempotency_key):
+    return {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+
+
+def timed_post(session, operation, url, **kwargs):
+    """
+    session.post mit Zeitmessung unter http.<operation> und Zähler je Statuscode.
+    """
+    with timed(f"http.{operation}"):
+        response = session.post(url, **kwargs)
+    count(f"http.{operation}.{response.status_code}")
+    return response
+
+
+def post_upload(session, api_base_url, training_id, upload_path, metadata, upload_mode="stream",
+                idempotency_key=None, timeout=UPLOAD_TIMEOUT):
+    """
+    Lädt eine Datei hoch. Gibt (response, upload_mode) zurück; upload_mode ist
+    "json", wenn der Server nur das alte /upload-Format kennt.
+    """
+    if upload_mode != "json":
+        response = post_upload_binary(session, api_base_url, training_id, upload_path, metadata, upload_mode,
+                                      idempotency_key, timeout)
+        if response.status_code in LEGACY_UPLOAD_STATUS_CODES:
+            print(f"Binär-Upload nicht unterstützt ({response.status_code}), verwende JSON/Base64.")
+            upload_mode = "json"
+    if upload_mode == "json":
+        response = post_upload_json(session, api_base_url, training_id, upload_path, metadata, idempotency_key,
+                                    timeout)
+    return response, upload_mode
+
+
+def post_upload_binary(session, api_base_url, training_id, upload_path, metadata, upload_mode,
+                       idempotency_key=None, timeout=UPLOAD_TIMEOUT):
+    """
+    Lädt die Datei binär hoch, ohne sie komplett in den Speicher zu lesen.
+    "stream": roher Body direkt von der Platte, Metadaten als Query-Parameter.
+    "multipart": multipart/form-data mit Metadaten als Formularfelder.
+    """
+    base_url = training_url(api_base_url, training_id)
+    content_type = metadata.get("content_type", "image/png")
+    with open(upload_path, "rb") as file:
+        if upload_mode == "multipart":
+            return timed_post(
+                session, "upload.multipart", f"{base_url}/upload/multipart",
+                files={"file": (metadata["filename"], file, content_type)},
+                data=metadata,
+                headers=idempotency_headers(idempotency_key),
+                timeout=timeout,
+            )
+        return timed_post(
+            session, "upload.stream", f"{base_url}/upload/stream",
+            data=file,
+            params=metadata,
+            headers=dict(idempotency_headers(idempotency_key), **{"Content-Type": content_type}),
+            timeout=timeout,
+        )
+
+
+def post_upload_json(session, api_base_url, training_id, upload_path, metadata, idempotency_key=None,
+                     timeout=UPLOAD_TIMEOUT):
+    """
+    Altes /upload-Format: Datei Base64-kodiert in einem JSON-Body.
+    """
+    url = f"{training_url(api_base_url, training_id)}/upload"
+    with open(upload_path, "rb") as file:
+        encoded_file = base64.b64encode(file.read()).decode("utf-8")
+    return timed_post(
+        session, "upload.json", url, json=dict(metadata, file=encoded_file),
+        headers=idempotency_headers(idempotency_key), timeout=timeout,
+    )
+
+
+def post_upload_check(session, api_base_url, training_id, files, timeout=UPLOAD_TIMEOUT):
+    """
+    Fragt ab, welche Inhalts-Hashes der Server bereits hat. files: [{"filename", "hash"}].
+    Gibt die Menge bekannter Hashes zurück (leer bei Servern ohne /upload/check).
+    """
+    response = timed_post(
+        session, "upload.check", f"{training_url(api_base_url, training_id)}/upload/check", json={"files": files},
+        timeout=timeout,
+    )
+    if response.status_code != 200:
+        return set()
+    return set(response.json().get("known", []))
+
+
+def post_sync(session, api_base_url, training_id, current_screenshot, idempotency_key=None, timeout=10):
+    return timed_post(
+        session, "sync", f"{training_url(api_base_url, training_id)}/sync",
+        json={"current_screenshot": current_screenshot},
+        headers=idempotency_headers(idempotency_key),
+        timeout=timeout,
+    )
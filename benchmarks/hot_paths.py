@@ -0,0 +1,374 @@
+"""
+Benchmark der Hot Paths des Trainee Managers, ohne Oberfläche.
+
+Erzeugt synthetische Trainings (N Screenshots je Auflösung) in einem
+temporären Ordner und misst
+  - gallery_build_ms: Training öffnen und die erste Seite Vorschaubilder
+    dekodieren (leerer Vorschaubild-Cache),
+  - gallery_cached_page_ms: erste Seite aus dem Screenshot-Index und dem
+    Speicher-Cache der Vorschaubilder (ohne Tk-Layout),
+  - gallery_rescan_ms: vollständiges Neueinlesen des Screenshot-Ordners,
+  - thumbnails_*_per_s: Vorschaubilder pro Sekunde aus dem Original (cold),
+    aus dem Platten-Cache (disk) und aus dem Speicher (memory),
+  - ingestion_*_ms: Zeit vom Anlegen einer Datei im Screenshot-Ordner bis sie
+    im Training liegt,
+  - upload_*: Debrief-Upload je Upload-Modus gegen den lokalen Stub-Server,
+  - sync_*_ms: Latenz des Live-Syncs gegen den Stub-Server.
+
+Das Zeichnen der Tk-Widgets wird nicht gemessen.
+
+    python benchmarks/hot_paths.py --screenshots 200 --resolution 1920x1080 --output hot_paths.json
+    python benchmarks/hot_paths.py --baseline hot_paths.json   # Exit-Code 1 bei Regression
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import queue
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from live_sync import LiveSyncClient  # noqa: E402
+from stub_server import StubApiServer  # noqa: E402
+from thumbnail_cache import THUMBNAIL_FOLDER, ThumbnailCache, ThumbnailLoader  # noqa: E402
+from trainee_service import TraineeService  # noqa: E402
+from training_service import TrainingService  # noqa: E402
+from training_store import TrainingStore  # noqa: E402
+
+DEFAULT_RESOLUTIONS = ("1920x1080",)
+UPLOAD_MODES = ("stream", "multipart", "json")
+# Entspricht GRID_COLUMNS * sichtbare Zeilen + Überhang in screenshot_grid.py
+FIRST_PAGE = 15
+DEFAULT_TOLERANCE = 0.2
+INGEST_TIMEOUT = 30
+
+
+def parse_resolution(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def render_screenshot(index, resolution):
+    """
+    Screenshot-ähnliches Bild: flächige Farben mit ein paar Fenstern und
+    Linien, je Index verschieden (damit sich auch die Hashes unterscheiden).
+    """
+    rng = random.Random(index)
+    width, height = resolution
+    image = Image.new("RGB", resolution, (rng.randrange(40, 80), rng.randrange(40, 80), rng.randrange(60, 100)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(width), rng.randrange(height)
+        draw.rectangle(
+            (x, y, x + rng.randrange(50, width // 3 + 51), y + rng.randrange(30, height // 3 + 31)),
+            fill=tuple(rng.randrange(256) for _ in range(3)),
+        )
+    for _ in range(40):
+        draw.line(
+            (rng.randrange(width), rng.randrange(height), rng.randrange(width), rng.randrange(height)),
+            fill=(0, 255, 0), width=2,
+        )
+    draw.text((10, 10), f"Screenshot {index}", fill=(255, 255, 255))
+    return image
+
+
+def create_training(training_folder, count, resolution):
+    """
+    Legt ein Training mit count Screenshots samt Aufnahmezeitpunkten und einigen Bemerkungen an.
+    """
+    from screenshot_ingestion import make_screenshot_filename
+
+    screenshot_folder = os.path.join(training_folder, "screenshots")
+    os.makedirs(screenshot_folder, exist_ok=True)
+    store = TrainingStore(training_folder)
+    start = datetime(2024, 1, 1, 10, 0, 0)
+    try:
+        for index in range(count):
+            captured_at = start + timedelta(seconds=index)
+            filename = make_screenshot_filename(captured_at)
+            render_screenshot(index, resolution).save(os.path.join(screenshot_folder, filename), "PNG")
+            store.record_capture(filename, captured_at)
+            if index % 5 == 0:
+                store.set_comment(filename, f"Bemerkung zu Screenshot {index}")
+    finally:
+        store.close()
+    return screenshot_folder
+
+
+def clear_thumbnail_cache(screenshot_folder):
+    shutil.rmtree(os.path.join(screenshot_folder, THUMBNAIL_FOLDER), ignore_errors=True)
+
+
+def decode_all(cache, paths, workers):
+    """
+    Dekodiert paths über den ThumbnailLoader wie das Grid und wartet auf alle Ergebnisse.
+    """
+    loader = ThumbnailLoader(cache, max_workers=workers)
+    try:
+        for path in paths:
+            loader.submit(path, ThumbnailCache.make_key(path))
+        for _ in paths:
+            loader.results.get()
+    finally:
+        loader.shutdown()
+
+
+def measure_gallery(training_folder, workers):
+    screenshot_folder = os.path.join(training_folder, "screenshots")
+    clear_thumbnail_cache(screenshot_folder)
+
+    start = time.perf_counter()
+    training = TrainingService(training_folder, "benchmark", "http://127.0.0.1:9")
+    cache = ThumbnailCache(training.screenshot_folder)
+    decode_all(cache, training.screenshots[:FIRST_PAGE], workers)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    screenshots = list(training.screenshots)
+    for path in screenshots[:FIRST_PAGE]:
+        cache.peek(ThumbnailCache.make_key(path))
+    cached_page_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    training.load_screenshots()
+    rescan_ms = (time.perf_counter() - start) * 1000
+    training.close()
+    return build_ms, cached_page_ms, rescan_ms
+
+
+def measure_thumbnails(screenshot_folder, paths, workers):
+    clear_thumbnail_cache(screenshot_folder)
+    results = {}
+    cache = ThumbnailCache(screenshot_folder, max_items=len(paths))
+    for name, fresh_cache in (("cold", False), ("disk", True), ("memory", False)):
+        if fresh_cache:
+            # Leerer Speicher-Cache, die Vorschaubilder liegen aber schon auf der Platte
+            cache = ThumbnailCache(screenshot_folder, max_items=len(paths))
+        start = time.perf_counter()
+        decode_all(cache, paths, workers)
+        results[f"thumbnails_{name}_per_s"] = len(paths) / (time.perf_counter() - start)
+    return results
+
+
+class IngestionListener:
+    def __init__(self):
+        self.ingested = queue.Queue()
+
+    def on_screenshots_ingested(self, paths):
+        now = time.perf_counter()
+        for path in paths:
+            self.ingested.put((now, path))
+
+
+def measure_ingestion(work_folder, resolution, count):
+    """
+    Schreibt count Screenshots nacheinander in den beobachteten Ordner und misst
+    jeweils die Zeit, bis sie im Trainingsordner angekommen sind.
+    """
+    trainee_folder = os.path.join(work_folder, "ingest-trainees")
+    incoming_folder = os.path.join(work_folder, "ingest-incoming")
+    os.makedirs(os.path.join(trainee_folder, "Benchmark-1"), exist_ok=True)
+    os.makedirs(incoming_folder, exist_ok=True)
+
+    buffer = io.BytesIO()
+    render_screenshot(0, resolution).save(buffer, "PNG")
+    data = buffer.getvalue()
+
+    listener = IngestionListener()
+    service = TraineeService(
+        trainee_folder, incoming_folder, listener=listener,
+        catalog_path=os.path.join(work_folder, "catalog.db"),
+        outbox_path=os.path.join(work_folder, "outbox.db"),
+    )
+    service.start_training("Benchmark-1", "Ingestion")
+    service.start()
+    latencies = []
+    try:
+        for index in range(count):
+            start = time.perf_counter()
+            with open(os.path.join(incoming_folder, f"Screenshot {index}.png"), "wb") as f:
+                f.write(data)
+            ingested_at, _ = listener.ingested.get(timeout=INGEST_TIMEOUT)
+            latencies.append((ingested_at - start) * 1000)
+    finally:
+        service.stop_training()
+        service.stop()
+    return latencies
+
+
+def measure_upload(training_folder, paths, api_base_url, upload_mode):
+    # Neue Training-ID, damit jeder Lauf alle Screenshots hochlädt
+    training = TrainingService(training_folder, str(uuid.uuid4()), api_base_url, upload_mode=upload_mode)
+    try:
+        start = time.perf_counter()
+        uploaded, failed, cancelled = training.upload_all()
+        elapsed = time.perf_counter() - start
+    finally:
+        training.close()
+    if failed or cancelled:
+        raise RuntimeError(f"Upload ({upload_mode}) fehlgeschlagen: {len(failed)} Datei(en)")
+    total_bytes = sum(os.path.getsize(path) for path in paths)
+    return len(uploaded) / elapsed, total_bytes / elapsed / 1_000_000
+
+
+def measure_sync(api_base_url, count):
+    client = LiveSyncClient(api_base_url, str(uuid.uuid4()))
+    latencies = []
+    try:
+        for index in range(count):
+            client.send(f"screenshot_{index}.png")
+            # Auf das Ergebnis warten, sonst fasst der Client die Werte zusammen
+            while True:
+                event = client.events.get(timeout=INGEST_TIMEOUT)
+                if event[0] == "sent":
+                    latencies.append(event[2])
+                    break
+                if event[0] == "failed":
+                    raise RuntimeError(f"Live-Sync fehlgeschlagen: {event[2]}")
+    finally:
+        client.close()
+    return latencies
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def median_of(runs, key):
+    return statistics.median(run[key] for run in runs)
+
+
+def run_resolution(work_folder, resolution, args, api_base_url):
+    label = f"{resolution[0]}x{resolution[1]}"
+    training_folder = os.path.join(work_folder, "trainees", "Benchmark-1", label)
+    print(f"[{label}] Erzeuge {args.screenshots} Screenshots ...", file=sys.stderr)
+    screenshot_folder = create_training(training_folder, args.screenshots, resolution)
+    paths = sorted(
+        os.path.join(screenshot_folder, name) for name in os.listdir(screenshot_folder) if name.endswith(".png")
+    )
+
+    runs = []
+    for _ in range(args.runs):
+        build_ms, cached_page_ms, rescan_ms = measure_gallery(training_folder, args.workers)
+        result = {
+            "gallery_build_ms": build_ms, "gallery_cached_page_ms": cached_page_ms, "gallery_rescan_ms": rescan_ms,
+        }
+        result.update(measure_thumbnails(screenshot_folder, paths, args.workers))
+        for upload_mode in UPLOAD_MODES:
+            files_per_s, mb_per_s = measure_upload(training_folder, paths, api_base_url, upload_mode)
+            result[f"upload_{upload_mode}_files_per_s"] = files_per_s
+            result[f"upload_{upload_mode}_mb_per_s"] = mb_per_s
+        runs.append(result)
+
+    results = {key: median_of(runs, key) for key in runs[0]}
+    results["screenshot_mb"] = sum(os.path.getsize(path) for path in paths) / 1_000_000
+
+    print(f"[{label}] Übernahme von {args.ingest_files} Screenshots ...", file=sys.stderr)
+    latencies = measure_ingestion(work_folder, resolution, args.ingest_files)
+    results["ingestion_median_ms"] = statistics.median(latencies)
+    results["ingestion_p95_ms"] = percentile(latencies, 0.95)
+    return label, results
+
+
+def run(args):
+    resolutions = [parse_resolution(text) for text in args.resolution or DEFAULT_RESOLUTIONS]
+    results = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "screenshots": args.screenshots,
+        "runs": args.runs,
+        "workers": args.workers,
+        "stub_latency_ms": args.stub_latency_ms,
+        "resolutions": {},
+    }
+    server = StubApiServer(latency_ms=args.stub_latency_ms).start()
+    try:
+        with tempfile.TemporaryDirectory() as work_folder, contextlib.redirect_stdout(io.StringIO()):
+            # Die Module melden jeden Upload per print(), das würde die Messung überdecken
+            for resolution in resolutions:
+                label, resolution_results = run_resolution(work_folder, resolution, args, server.base_url)
+                results["resolutions"][label] = resolution_results
+            latencies = measure_sync(server.base_url, args.sync_messages)
+        results["sync_median_ms"] = statistics.median(latencies)
+        results["sync_p95_ms"] = percentile(latencies, 0.95)
+        results["stub_requests"] = dict(server.counts)
+    finally:
+        server.stop()
+    return results
+
+
+def flatten(results, prefix=""):
+    values = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and (key.endswith("_ms") or key.endswith("_per_s")):
+            values[f"{prefix}{key}"] = value
+    return values
+
+
+def compare(results, baseline, tolerance):
+    """
+    Gibt (Vergleichszeilen, Regressionen) zurück. Bei *_ms ist weniger besser,
+    bei *_per_s mehr.
+    """
+    old_values, new_values = flatten(baseline), flatten(results)
+    lines, regressions = [], []
+    for key, new in new_values.items():
+        old = old_values.get(key)
+        if not old:
+            continue
+        change = (new - old) / old
+        lines.append(f"{key}: {old:.1f} -> {new:.1f} ({change:+.0%})")
+        worse = change if key.endswith("_ms") else -change
+        if worse > tolerance:
+            regressions.append(lines[-1])
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--screenshots", type=int, default=200, help="Screenshots pro Auflösung")
+    parser.add_argument("--resolution", action="append", help="z.B. 1920x1080, mehrfach angebbar")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Threads für Vorschaubilder")
+    parser.add_argument("--ingest-files", type=int, default=20)
+    parser.add_argument("--sync-messages", type=int, default=50)
+    parser.add_argument("--stub-latency-ms", type=float, default=0, help="künstliche Serverlatenz")
+    parser.add_argument("--output", help="Ergebnis als JSON in diese Datei schreiben")
+    parser.add_argument("--baseline", help="JSON eines früheren Laufs zum Vergleich")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = run(args)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            lines, regressions = compare(results, json.load(f), args.tolerance)
+        for line in lines:
+            print(line, file=sys.stderr)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Startzeit-Benchmark des Trainee Managers.
+
+Misst in frischen Interpreter-Prozessen
+  - import_ms: Import von trainee_manager (ohne Fenster) und welche schweren
+    Abhängigkeiten dabei schon geladen werden (sollte keine sein),
+  - first_frame_ms: Zeit von Prozessstart bis zum ersten gezeichneten Fenster
+    (nur mit Display, z.B. unter Windows oder mit gesetztem DISPLAY).
+
+    python benchmarks/startup.py --runs 5 --output startup.json
+    python benchmarks/startup.py --baseline startup.json   # Exit-Code 1 bei Regression
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Module, die der Start nicht laden soll
+HEAVY_MODULES = ("docx", "requests", "PIL.ImageTk", "PIL.Image", "watchdog.observers")
+# Erlaubte Verschlechterung gegenüber der Baseline
+DEFAULT_TOLERANCE = 0.2
+
+IMPORT_SNIPPET = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import trainee_manager
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"import_ms": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import():
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(root=REPO_ROOT, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def has_display():
+    return os.name == "nt" or bool(os.environ.get("DISPLAY"))
+
+
+def measure_first_frame(work_folder):
+    env = dict(os.environ, TRAINEE_MANAGER_STARTUP_BENCHMARK="1")
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, os.path.join(REPO_ROOT, "main.py")],
+        cwd=work_folder, env=env, capture_output=True, text=True, timeout=60,
+    ).stdout
+    total_ms = (time.perf_counter() - start) * 1000
+    for line in output.splitlines():
+        if line.startswith("first_frame_ms="):
+            return float(line.split("=", 1)[1]), total_ms
+    raise RuntimeError(f"Keine Startzeit in der Ausgabe:\n{output}")
+
+
+def run(runs):
+    results = {"runs": runs, "python": sys.version.split()[0], "platform": sys.platform}
+
+    imports = [measure_import() for _ in range(runs)]
+    results["import_ms"] = statistics.median(item["import_ms"] for item in imports)
+    results["heavy_modules_at_start"] = sorted({name for item in imports for name in item["heavy"]})
+
+    if has_display():
+        # Eigener Arbeitsordner mit Konfiguration, damit kein Ordner-Dialog erscheint
+        with tempfile.TemporaryDirectory() as work_folder:
+            trainee_folder = os.path.join(work_folder, "trainees")
+            os.makedirs(trainee_folder)
+            with open(os.path.join(work_folder, "config.json"), "w", encoding="utf-8") as f:
+                json.dump({"trainee_folder": trainee_folder}, f)
+            frames = [measure_first_frame(work_folder) for _ in range(runs)]
+        results["first_frame_ms"] = statistics.median(first for first, _ in frames)
+        results["process_total_ms"] = statistics.median(total for _, total in frames)
+    else:
+        results["first_frame_ms"] = None
+        print("Kein Display gefunden, first_frame_ms wird übersprungen.", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Liefert die Liste der Messwerte, die um mehr als tolerance schlechter sind.
+    """
+    regressions = []
+    for key in ("import_ms", "first_frame_ms"):
+        old, new = baseline.get(key), results.get(key)
+        if old and new and new > old * (1 + tolerance):
+            regressions.append(f"{key}: {old:.1f} -> {new:.1f} ms")
+    for name in results["heavy_modules_at_start"]:
+        if name not in baseline.get("heavy_modules_at_start", []):
+            regressions.append(f"{name} wird beim Start geladen")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Ergebnis als JSON in diese Datei schreiben")
+    parser.add_argument("--baseline", help="JSON eines früheren Laufs zum Vergleich")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
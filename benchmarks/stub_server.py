@@ -0,0 +1,110 @@
+"""
+Lokaler Stub der Trainee-Manager-API für Benchmarks und manuelle Tests.
+
+Nimmt /upload, /upload/stream, /upload/multipart, /upload/check und /sync
+unter /api/Vatsim/traineemanager/training/<ID>/ an, liest den Body vollständig
+und antwortet mit 200. Optional mit künstlicher Latenz pro Anfrage.
+
+    python benchmarks/stub_server.py --port 3000 --latency-ms 20
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRAINING_PREFIX = "/api/Vatsim/traineemanager/training/"
+ENDPOINTS = ("upload", "upload/stream", "upload/multipart", "upload/check", "sync")
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-Alive wie beim echten Server
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        endpoint = path[len(TRAINING_PREFIX):].split("/", 1)[-1] if path.startswith(TRAINING_PREFIX) else ""
+        body = self.read_body()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if endpoint not in ENDPOINTS:
+            self.respond(404, b"")
+            return
+        self.server.record(endpoint, len(body))
+        if endpoint == "upload/check":
+            # Der Stub kennt nie einen Inhalt, es wird also immer alles hochgeladen
+            self.respond(200, json.dumps({"known": []}).encode("utf-8"), "application/json")
+        else:
+            self.respond(200, b"")
+
+    def read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip() or b"0", 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def respond(self, status, body, content_type="text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency_ms=0):
+        super().__init__(("127.0.0.1", port), StubApiHandler)
+        self.latency = latency_ms / 1000
+        self.counts = {}
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def record(self, endpoint, size):
+        with self._lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            self.bytes_received += size
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    server = StubApiServer(args.port, args.latency_ms)
+    print(f"Stub-API läuft auf {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.counts))
+
+
+if __name__ == "__main__":
+    main()
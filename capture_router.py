@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+
+from screenshot_ingestion import SCREENSHOT_EXTENSIONS
+
+DEFAULT_PROFILE = "default"
+
+
+class CaptureSource:
+    """
+    Ein beobachteter Ordner, in den ein Aufnahme-Werkzeug schreibt.
+
+    extensions filtert die Dateiendungen, profile ordnet die Quelle einem
+    Aufnahmeprofil zu (z.B. ein Hotkey-Profil pro Ausbilder oder Monitor).
+    """
+
+    def __init__(self, folder, extensions=(".png",), recursive=False, profile=DEFAULT_PROFILE):
+        self.folder = os.path.normpath(folder)
+        self.extensions = tuple(
+            (ext if ext.startswith(".") else f".{ext}").lower() for ext in extensions
+        )
+        self.recursive = recursive
+        self.profile = profile
+
+    @classmethod
+    def from_config(cls, settings):
+        """
+        Eintrag aus "capture_sources", z.B.
+        {"folder": "D:/ShareX/Monitor2", "extensions": ["png", "jpg", "webp"], "recursive": true, "profile": "monitor2"}
+        """
+        return cls(
+            settings["folder"],
+            extensions=settings.get("extensions") or SCREENSHOT_EXTENSIONS,
+            recursive=settings.get("recursive", False),
+            profile=settings.get("profile") or DEFAULT_PROFILE,
+        )
+
+    def contains(self, path):
+        parent = os.path.dirname(os.path.normpath(path))
+        if self.recursive:
+            return parent == self.folder or parent.startswith(self.folder + os.sep)
+        return parent == self.folder
+
+    def accepts(self, path):
+        return os.path.splitext(path)[1].lower() in self.extensions and self.contains(path)
+
+
+def sources_from_config(settings, default_folder):
+    """
+    Aufnahmequellen aus der Konfiguration; ohne Eintrag nur default_folder (PNG), wie bisher.
+    """
+    if not settings:
+        return [CaptureSource(default_folder)]
+    return [CaptureSource.from_config(entry) for entry in settings]
+
+
+class ActiveTraining:
+    def __init__(self, folder, training_id, profile=DEFAULT_PROFILE):
+        self.folder = folder
+        self.training_id = training_id
+        self.profile = profile
+        self.start_time = time.time()
+
+
+class CaptureRouter:
+    """
+    Ordnet neue Dateien aus mehreren Quellordnern dem passenden laufenden Training zu.
+
+    Jede Quelle gehört zu einem Profil, pro Profil kann ein Training laufen.
+    Eine Aufnahme geht an das Training ihres Profils; läuft nur ein einziges
+    Training, bekommt es alle Aufnahmen (bisheriges Verhalten). Aufnahmen, für
+    die sich kein Training findet, bleiben im Quellordner liegen.
+
+    route() wird im Dispatch-Thread des Observers aufgerufen, activate() und
+    deactivate() im Tk- bzw. Haupt-Thread, daher der Lock.
+    """
+
+    def __init__(self, sources):
+        # Bei verschachtelten Ordnern gewinnt der spezifischste
+        self.sources = sorted(sources, key=lambda source: len(source.folder), reverse=True)
+        self.trainings = {}  # Profil -> ActiveTraining
+        self.current = None  # Zuletzt gestartetes Training (für Oberfläche und Kommandozeile)
+        self._lock = threading.Lock()
+
+    @property
+    def profiles(self):
+        return sorted({source.profile for source in self.sources})
+
+    def activate(self, training):
+        """
+        Startet training für sein Profil. Gibt ein dadurch ersetztes Training zurück.
+        """
+        with self._lock:
+            previous = self.trainings.get(training.profile)
+            self.trainings[training.profile] = training
+            self.current = training
+            return previous
+
+    def deactivate(self, profile):
+        with self._lock:
+            training = self.trainings.pop(profile, None)
+            if training is self.current:
+                # Auf das zuletzt gestartete der verbleibenden Trainings zurückfallen
+                remaining = sorted(self.trainings.values(), key=lambda item: item.start_time)
+                self.current = remaining[-1] if remaining else None
+            return training
+
+    def active(self):
+        with self._lock:
+            return list(self.trainings.values())
+
+    def source_for(self, path):
+        # Mehrere Quellen im selben Ordner können sich die Endungen aufteilen
+        for source in self.sources:
+            if source.accepts(path):
+                return source
+        return None
+
+    def route(self, path):
+        """
+        Liefert das Training, in das die Datei gehört, oder None.
+        """
+        source = self.source_for(path)
+        if source is None:
+            return None
+        with self._lock:
+            training = self.trainings.get(source.profile)
+            if training is None and len(self.trainings) == 1:
+                training = next(iter(self.trainings.values()))
+            return training
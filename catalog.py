@@ -0,0 +1,335 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from screenshot_ingestion import is_screenshot_file
+from training_archive import TrainingArchive, archive_path, is_archived
+from training_store import STORE_FILE
+
+CATALOG_FILE = "catalog.db"
+# Wartezeit (s), in der Änderungen an einem Training zu einer Neuindizierung zusammengefasst werden
+REINDEX_DELAY = 1.0
+# Dateien, deren Änderungen keine Neuindizierung auslösen (u.a. SQLite-Shared-Memory des Lesezugriffs)
+IGNORED_SUFFIXES = ("-shm", "-journal", ".part")
+IGNORED_FOLDERS = (".thumbs", ".upload_cache")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS trainees (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS trainings (
+    path TEXT PRIMARY KEY,
+    trainee TEXT NOT NULL,
+    name TEXT NOT NULL,
+    screenshot_count INTEGER NOT NULL DEFAULT 0,
+    duration_seconds REAL NOT NULL DEFAULT 0,
+    source_mtime_ns INTEGER NOT NULL DEFAULT 0,
+    indexed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS trainings_trainee ON trainings(trainee);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    trainee TEXT NOT NULL,
+    training TEXT NOT NULL DEFAULT '',
+    filename TEXT NOT NULL DEFAULT '',
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_owner ON entries(trainee, training);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    trainee, training, filename, text,
+    content='entries', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, trainee, training, filename, text)
+    VALUES (new.id, new.trainee, new.training, new.filename, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, trainee, training, filename, text)
+    VALUES ('delete', old.id, old.trainee, old.training, old.filename, old.text);
+END;
+"""
+
+
+def connect_catalog(catalog_path=CATALOG_FILE):
+    conn = sqlite3.connect(catalog_path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with conn:
+        conn.executescript(SCHEMA)
+    return conn
+
+
+def build_match_query(text):
+    # Jedes Wort als Präfix-Suche, Anführungszeichen maskiert
+    tokens = text.split()
+    return " ".join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+
+def search(conn, text, limit=100):
+    """
+    Volltextsuche über Trainee-Namen, Trainingsnamen und Bemerkungen.
+    Liefert Tupel (trainee, training, filename, text).
+    """
+    query = build_match_query(text)
+    if not query:
+        return []
+    return conn.execute(
+        "SELECT e.trainee, e.training, e.filename, e.text FROM entries_fts "
+        "JOIN entries e ON e.id = entries_fts.rowid "
+        "WHERE entries_fts MATCH ? ORDER BY rank LIMIT ?",
+        (query, limit),
+    ).fetchall()
+
+
+def read_training_store(training_path):
+    """
+    Liest Bemerkungen und Dauer aus dem training.db eines Trainings, nur lesend,
+    damit der Katalog selbst keine Schreibzugriffe (und damit Watcher-Events) auslöst.
+    """
+    db_path = os.path.join(training_path, STORE_FILE)
+    if not os.path.exists(db_path):
+        return {}, 0
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=10)
+    try:
+        comments = dict(conn.execute("SELECT filename, comment FROM screenshots WHERE comment != ''"))
+        row = conn.execute("SELECT value FROM meta WHERE key = 'duration_seconds'").fetchone()
+        return comments, float(row[0]) if row else 0
+    finally:
+        conn.close()
+
+
+def training_mtime_ns(training_path):
+    """
+    Neueste mtime der Dateien und Ordner, deren Änderung den Katalogeintrag
+    eines Trainings betrifft. Vergleich per Gleichheit, daher unabhängig von
+    abweichenden Uhren anderer Rechner am selben Share.
+    """
+    db_path = os.path.join(training_path, STORE_FILE)
+    candidates = (
+        training_path, os.path.join(training_path, "screenshots"), db_path, f"{db_path}-wal",
+        archive_path(training_path),
+    )
+    newest = 0
+    for path in candidates:
+        try:
+            newest = max(newest, os.stat(path).st_mtime_ns)
+        except OSError:
+            pass
+    return newest
+
+
+class CatalogIndexer:
+    """
+    Hält den Katalog aller Trainees und Trainings aktuell.
+
+    Watcher-Events auf dem Trainee-Ordner werden per mark_dirty() gemeldet und
+    pro Trainee/Training gesammelt; nach REINDEX_DELAY ohne weitere Änderung wird
+    nur der betroffene Eintrag neu indiziert. Beim Start gleicht reconcile()
+    den Katalog mit den mtimes der Trainingsordner ab, sodass auch Änderungen
+    bei geschlossenem Programm oder von anderen Rechnern ankommen.
+    Schreibzugriffe auf den Katalog erfolgen ausschließlich in diesem Thread.
+    """
+
+    def __init__(self, trainee_folder, catalog_path=CATALOG_FILE):
+        self.trainee_folder = os.path.abspath(trainee_folder)
+        self.catalog_path = catalog_path
+        self.incoming = queue.Queue()
+        self.dirty = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def mark_dirty(self, path):
+        key = self.owner_of(path)
+        if key:
+            self.incoming.put(key)
+
+    def request_full_reindex(self):
+        # Vollständiger Neuaufbau im Indexer-Thread (Schaltfläche im Suchfenster)
+        self.incoming.put(None)
+
+    def owner_of(self, path):
+        """
+        Ordnet einen Pfad (trainee,) bzw. (trainee, training) zu, oder None.
+        """
+        if path.endswith(IGNORED_SUFFIXES):
+            return None
+        try:
+            relative = os.path.relpath(os.path.abspath(path), self.trainee_folder)
+        except ValueError:
+            return None
+        parts = relative.split(os.sep)
+        if parts[0] in (os.curdir, os.pardir) or any(part in IGNORED_FOLDERS for part in parts):
+            return None
+        return tuple(parts[:2])
+
+    def _run(self):
+        conn = connect_catalog(self.catalog_path)
+        try:
+            if conn.execute("SELECT value FROM meta WHERE key = 'root'").fetchone() != (self.trainee_folder,):
+                self.reindex_all(conn)
+            else:
+                self.reconcile(conn)
+
+            while not self._stop_event.is_set():
+                try:
+                    key = self.incoming.get(timeout=0.2)
+                    if key is None:
+                        self.reindex_all(conn)
+                    else:
+                        self.dirty[key] = time.monotonic()
+                except queue.Empty:
+                    pass
+
+                now = time.monotonic()
+                for key, marked_at in list(self.dirty.items()):
+                    if now - marked_at >= REINDEX_DELAY:
+                        del self.dirty[key]
+                        self._reindex_key(conn, key)
+        finally:
+            conn.close()
+
+    def _reindex_key(self, conn, key):
+        try:
+            if len(key) == 1:
+                self.reindex_trainee(conn, key[0], recursive=False)
+            else:
+                self.reindex_training(conn, key[0], key[1])
+        except Exception as e:
+            print(f"Fehler beim Aktualisieren des Katalogs für {os.path.join(*key)}: {e}")
+
+    def reindex_all(self, conn):
+        """
+        Vollständiger Neuaufbau, z.B. beim ersten Start oder nach Wechsel des Trainee-Ordners.
+        """
+        with conn:
+            conn.execute("DELETE FROM trainees")
+            conn.execute("DELETE FROM trainings")
+            conn.execute("DELETE FROM entries")
+        if os.path.isdir(self.trainee_folder):
+            with os.scandir(self.trainee_folder) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        try:
+                            self.reindex_trainee(conn, entry.name, recursive=True)
+                        except Exception as e:
+                            print(f"Fehler beim Indizieren von {entry.name}: {e}")
+        # Erst nach vollständigem Durchlauf als aktuell markieren
+        with conn:
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('root', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (self.trainee_folder,),
+            )
+
+    def reconcile(self, conn):
+        """
+        Indiziert nur Trainings neu, die seit der letzten Indizierung geändert,
+        hinzugefügt oder entfernt wurden, ebenso hinzugefügte/entfernte Trainees.
+        """
+        known_trainees = {name for name, in conn.execute("SELECT name FROM trainees")}
+        known_trainings = {
+            path: (trainee, name, mtime_ns)
+            for path, trainee, name, mtime_ns in conn.execute(
+                "SELECT path, trainee, name, source_mtime_ns FROM trainings"
+            )
+        }
+        trainees = []
+        if os.path.isdir(self.trainee_folder):
+            with os.scandir(self.trainee_folder) as entries:
+                trainees = [entry.name for entry in entries if entry.is_dir()]
+
+        for trainee in trainees:
+            if self._stop_event.is_set():
+                return
+            try:
+                if trainee not in known_trainees:
+                    self.reindex_trainee(conn, trainee, recursive=False)
+                trainee_path = os.path.join(self.trainee_folder, trainee)
+                with os.scandir(trainee_path) as entries:
+                    trainings = [entry.name for entry in entries if entry.is_dir()]
+                for training in trainings:
+                    training_path = os.path.join(trainee_path, training)
+                    known = known_trainings.pop(training_path, None)
+                    if known is None or known[2] != training_mtime_ns(training_path):
+                        self.reindex_training(conn, trainee, training)
+            except Exception as e:
+                print(f"Fehler beim Abgleich des Katalogs für {trainee}: {e}")
+
+        # Nicht mehr vorhandene Trainees und Trainings entfernen
+        for trainee in known_trainees.difference(trainees):
+            self._reindex_key(conn, (trainee,))
+        for trainee, training, _ in known_trainings.values():
+            self._reindex_key(conn, (trainee, training))
+
+    def reindex_trainee(self, conn, trainee, recursive):
+        trainee_path = os.path.join(self.trainee_folder, trainee)
+        with conn:
+            if not os.path.isdir(trainee_path):
+                conn.execute("DELETE FROM trainees WHERE name = ?", (trainee,))
+                conn.execute("DELETE FROM trainings WHERE trainee = ?", (trainee,))
+                conn.execute("DELETE FROM entries WHERE trainee = ?", (trainee,))
+                return
+            if conn.execute("SELECT 1 FROM trainees WHERE name = ?", (trainee,)).fetchone() is None:
+                conn.execute("INSERT INTO trainees (name) VALUES (?)", (trainee,))
+                conn.execute("INSERT INTO entries (trainee, text) VALUES (?, ?)", (trainee, trainee))
+        if recursive:
+            with os.scandir(trainee_path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        self.reindex_training(conn, trainee, entry.name)
+
+    def reindex_training(self, conn, trainee, training):
+        training_path = os.path.join(self.trainee_folder, trainee, training)
+        if not os.path.isdir(training_path):
+            with conn:
+                conn.execute("DELETE FROM trainings WHERE path = ?", (training_path,))
+                conn.execute("DELETE FROM entries WHERE trainee = ? AND training = ?", (trainee, training))
+            return
+
+        # Vor dem Lesen bestimmen: Änderungen währenddessen lösen beim nächsten Abgleich erneut aus
+        source_mtime_ns = training_mtime_ns(training_path)
+        screenshot_count = 0
+        screenshots_folder = os.path.join(training_path, "screenshots")
+        if os.path.isdir(screenshots_folder):
+            with os.scandir(screenshots_folder) as entries:
+                screenshot_count = sum(1 for entry in entries if is_screenshot_file(entry.name) and entry.is_file())
+        if is_archived(training_path):
+            # Archivierte Bilder zählen mit, das Manifest reicht dafür
+            archive = TrainingArchive(training_path)
+            screenshot_count += len(archive.entries)
+            archive.close()
+        comments, duration = read_training_store(training_path)
+
+        with conn:
+            conn.execute(
+                "INSERT INTO trainings (path, trainee, name, screenshot_count, duration_seconds, source_mtime_ns, "
+                "indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(path) DO UPDATE SET "
+                "screenshot_count = excluded.screenshot_count, duration_seconds = excluded.duration_seconds, "
+                "source_mtime_ns = excluded.source_mtime_ns, indexed_at = excluded.indexed_at",
+                (training_path, trainee, training, screenshot_count, duration, source_mtime_ns,
+                 datetime.now().isoformat()),
+            )
+            conn.execute("DELETE FROM entries WHERE trainee = ? AND training = ?", (trainee, training))
+            conn.execute(
+                "INSERT INTO entries (trainee, training, text) VALUES (?, ?, ?)", (trainee, training, training)
+            )
+            conn.executemany(
+                "INSERT INTO entries (trainee, training, filename, text) VALUES (?, ?, ?, ?)",
+                [(trainee, training, filename, comment) for filename, comment in comments.items()],
+            )
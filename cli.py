@@ -0,0 +1,267 @@
+"""
+Kommandozeile des Trainee Managers, ohne Tk, ImageTk oder python-docx beim Start.
+
+    python main.py watch --trainee <Trainee> --training <Training> [--profile <Profil>]
+    python main.py debrief-upload <Trainingsordner> [--training-id <ID>]
+    python main.py export <Trainings- oder Trainee-Ordner> [--trainee]
+    python main.py reindex
+    python main.py archive [--older-than <Tage>] [--trainee <Trainee>] [--dry-run]
+    python main.py restore <Trainingsordner>
+    python main.py daemon [--trainee <Trainee> --training <Training>]
+
+Mit --trace <Datei> werden die Hot Paths gemessen und beim Beenden als
+Chrome-Trace geschrieben (siehe instrumentation.py).
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+
+from api_client import DEFAULT_API_BASE_URL
+from capture_router import DEFAULT_PROFILE, CaptureSource, sources_from_config
+from catalog import CatalogIndexer, connect_catalog
+from image_transcoder import ImageTranscoder
+from instrumentation import metrics
+from trainee_service import DEFAULT_SCREENSHOT_FOLDER, TraineeService
+from training_archive import DEFAULT_ARCHIVE_AFTER_DAYS, restore_training
+from training_service import TrainingService
+from training_store import TrainingStore
+from utils import load_config
+
+
+class ConsoleListener:
+    def on_screenshots_ingested(self, paths):
+        for path in paths:
+            print(f"Screenshot übernommen: {path}")
+
+    def on_trainee_added(self, folder_name):
+        print(f"Trainee hinzugekommen: {folder_name}")
+
+    def on_trainee_removed(self, folder_name):
+        print(f"Trainee entfernt: {folder_name}")
+
+
+def wait_for_shutdown():
+    """
+    Blockiert bis Strg+C bzw. SIGTERM.
+    """
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    while not stop_event.wait(1):
+        pass
+
+
+def capture_sources(args, config):
+    # --screenshot-folder ersetzt die konfigurierten Aufnahmequellen
+    if args.screenshot_folder:
+        return [CaptureSource(args.screenshot_folder, profile=args.profile)]
+    return sources_from_config(config.get("capture_sources"), DEFAULT_SCREENSHOT_FOLDER)
+
+
+def run_service(args, config, training_required):
+    sources = capture_sources(args, config)
+    service = TraineeService(
+        args.trainee_folder, sources[0].folder, listener=ConsoleListener(), capture_sources=sources
+    )
+    if args.trainee and args.training:
+        service.start_training(args.trainee, args.training, args.profile)
+        print(f"Trainingsmodus aktiv: {service.current_training_folder} (ID {service.current_training_id})")
+    elif training_required:
+        print("Bitte --trainee und --training angeben.")
+        return 2
+
+    for source in sources:
+        os.makedirs(source.folder, exist_ok=True)
+    service.start()
+    for source in sources:
+        print(f"Beobachte {source.folder} ({', '.join(source.extensions)}, Profil {source.profile})")
+    print("Beenden mit Strg+C.")
+    try:
+        wait_for_shutdown()
+    finally:
+        for profile, duration in service.stop_all_trainings().items():
+            if duration is not None:
+                print(f"Das Training ({profile}) dauerte: {int(duration // 60)} min")
+        service.stop()
+    return 0
+
+
+def command_watch(args, config):
+    return run_service(args, config, training_required=True)
+
+
+def command_daemon(args, config):
+    # Katalog, Outbox-Wiederholungen und optional Screenshot-Übernahme im Dauerbetrieb
+    return run_service(args, config, training_required=False)
+
+
+def command_debrief_upload(args, config):
+    training_id = args.training_id
+    if not training_id:
+        store = TrainingStore(args.training_folder)
+        try:
+            training_id = store.get_meta("training_id")
+        finally:
+            store.close()
+    if not training_id:
+        print("Keine Training-ID gespeichert, bitte --training-id angeben.")
+        return 2
+
+    transcoder = ImageTranscoder.from_config(config.get("upload_transcode"))
+    training = TrainingService(
+        args.training_folder, training_id, args.api_base_url,
+        upload_mode=config.get("upload_mode", "stream"), transcoder=transcoder,
+    )
+    try:
+        pending = training.get_pending_uploads()
+        print(f"{len(pending)} von {len(training.screenshots)} Screenshot(s) ausstehend.")
+        done = [0]
+
+        def on_progress(path, success):
+            done[0] += 1
+            status = "ok" if success else "FEHLER"
+            print(f"[{done[0]}/{len(pending)}] {os.path.basename(path)}: {status}")
+
+        uploaded, failed, cancelled = training.upload_all(on_progress)
+        print(f"Hochgeladen: {len(uploaded)}, fehlgeschlagen: {len(failed)}")
+        return 1 if failed or cancelled else 0
+    finally:
+        training.close()
+        if transcoder:
+            transcoder.shutdown()
+
+
+def command_export(args, config):
+    # python-docx erst hier laden
+    from report_export import ReportExporter
+
+    exporter = ReportExporter(max_workers=args.workers or config.get("export_workers"))
+    try:
+        if args.trainee:
+            written, failed = exporter.export_trainee(args.path).result()
+        else:
+            written, failed = [exporter.export(args.path).result()], []
+    finally:
+        exporter.shutdown()
+    for path in written:
+        print(f"Bericht exportiert: {path}")
+    for path in failed:
+        print(f"Fehler beim Exportieren: {path}")
+    return 1 if failed else 0
+
+
+def command_reindex(args, config):
+    indexer = CatalogIndexer(args.trainee_folder)
+    conn = connect_catalog(indexer.catalog_path)
+    try:
+        indexer.reindex_all(conn)
+        trainings = conn.execute("SELECT COUNT(*) FROM trainings").fetchone()[0]
+    finally:
+        conn.close()
+    print(f"Katalog neu aufgebaut: {trainings} Training(s).")
+    return 0
+
+
+def command_archive(args, config):
+    service = TraineeService(args.trainee_folder, DEFAULT_SCREENSHOT_FOLDER)
+    try:
+        older_than = args.older_than if args.older_than is not None else config.get(
+            "archive_after_days", DEFAULT_ARCHIVE_AFTER_DAYS
+        )
+        results = service.archive_old_trainings(older_than, args.trainee, dry_run=args.dry_run)
+    finally:
+        service.outbox.close()
+    for training_folder, count, freed in results:
+        if args.dry_run:
+            print(f"Würde archivieren: {training_folder}")
+        else:
+            print(f"Archiviert: {training_folder} ({count} Bild(er), {freed / 1_000_000:.1f} MB frei)")
+    print(f"{len(results)} Training(s) {'gefunden' if args.dry_run else 'archiviert'}.")
+    return 0
+
+
+def command_restore(args, config):
+    count = restore_training(args.training_folder)
+    print(f"Wiederhergestellt: {count} Bild(er) in {args.training_folder}")
+    return 0
+
+
+def build_parser(config):
+    parser = argparse.ArgumentParser(prog="traineemanager", description="Trainee Manager ohne Oberfläche")
+    parser.add_argument("--trainee-folder", default=config.get("trainee_folder", ""))
+    parser.add_argument("--screenshot-folder", help="statt der konfigurierten Aufnahmequellen nur diesen Ordner beobachten")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="Aufnahmeprofil des Trainings")
+    parser.add_argument("--api-base-url", default=config.get("api_base_url", DEFAULT_API_BASE_URL))
+    parser.add_argument("--trace", help="Zeitmessung einschalten und beim Beenden als Trace in diese Datei schreiben")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    watch = commands.add_parser("watch", help="Screenshots in ein Training übernehmen")
+    watch.add_argument("--trainee", required=True)
+    watch.add_argument("--training", required=True)
+    watch.set_defaults(func=command_watch)
+
+    daemon = commands.add_parser("daemon", help="Dauerbetrieb: Katalog, Outbox, optional Trainingsmodus")
+    daemon.add_argument("--trainee")
+    daemon.add_argument("--training")
+    daemon.set_defaults(func=command_daemon)
+
+    upload = commands.add_parser("debrief-upload", help="Ausstehende Screenshots eines Trainings hochladen")
+    upload.add_argument("training_folder")
+    upload.add_argument("--training-id")
+    upload.set_defaults(func=command_debrief_upload)
+
+    export = commands.add_parser("export", help="Debrief-Bericht als DOCX exportieren")
+    export.add_argument("path", help="Trainingsordner bzw. mit --trainee ein Trainee-Ordner")
+    export.add_argument("--trainee", action="store_true", help="alle Trainings des Trainees parallel exportieren")
+    export.add_argument("--workers", type=int)
+    export.set_defaults(func=command_export)
+
+    reindex = commands.add_parser("reindex", help="Katalog vollständig neu aufbauen")
+    reindex.set_defaults(func=command_reindex)
+
+    archive = commands.add_parser("archive", help="Alte Trainings in screenshots.zip archivieren")
+    archive.add_argument("--older-than", type=float, help="Tage seit dem letzten Screenshot")
+    archive.add_argument("--trainee", help="nur diesen Trainee-Ordner")
+    archive.add_argument("--dry-run", action="store_true", help="nur anzeigen, nichts verändern")
+    archive.set_defaults(func=command_archive)
+
+    restore = commands.add_parser("restore", help="Archiviertes Training wieder entpacken")
+    restore.add_argument("training_folder")
+    restore.set_defaults(func=command_restore)
+    return parser
+
+
+def main(argv=None):
+    config = load_config()
+    args = build_parser(config).parse_args(argv)
+    if args.command in ("watch", "daemon", "reindex", "archive") and not os.path.isdir(args.trainee_folder):
+        print("Kein gültiger Trainee-Ordner, bitte --trainee-folder angeben.")
+        return 2
+    if not args.trace:
+        return args.func(args, config)
+
+    metrics.enable()
+    try:
+        return args.func(args, config)
+    finally:
+        print_metrics()
+        events = metrics.export_trace(args.trace)
+        print(f"Trace mit {events} Messungen geschrieben: {args.trace}")
+
+
+def print_metrics():
+    rows, counters = metrics.snapshot()
+    for row in rows:
+        print(
+            f"{row['name']:<28} n={row['count']:<6} avg={row['avg_ms']:.1f} ms  "
+            f"p95={row['p95_ms']:.1f} ms  max={row['max_ms']:.1f} ms"
+        )
+    for name, value in counters.items():
+        print(f"{name:<28} {value}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, features
+
+from screenshot_ingestion import screenshot_content_type
+
+UPLOAD_CACHE_FOLDER = ".upload_cache"
+
+FORMATS = {
+    "png": ("PNG", ".png", "image/png"),
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "avif": ("AVIF", ".avif", "image/avif"),
+}
+
+
+def convert_to_srgb(image, icc_profile):
+    """
+    Rechnet die Pixel aus dem eingebetteten Profil (z.B. Display P3 von macOS)
+    nach sRGB um, damit das Entfernen des Profils die Farben nicht verschiebt.
+    """
+    from PIL import ImageCms
+
+    if image.mode not in ("RGB", "RGBA", "L"):
+        image = image.convert("RGBA" if image.mode in ("LA", "PA") else "RGB")
+    output_mode = "RGBA" if image.mode == "RGBA" else "RGB"
+    source_profile = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+    return ImageCms.profileToProfile(image, source_profile, ImageCms.createProfile("sRGB"), outputMode=output_mode)
+
+
+def transcode_image(source_path, target_path, max_size, image_format, quality, lossless):
+    """
+    Skaliert, kodiert neu und entfernt Metadaten. Läuft im Prozess-Pool,
+    muss daher eine Funktion auf Modulebene sein.
+
+    Farbprofile werden vorher nach sRGB umgerechnet (gelingt das nicht, bleibt
+    das Profil erhalten), Transparenz von Palette- und Graustufenbildern
+    bleibt als Alphakanal erhalten.
+    """
+    pil_format = FORMATS[image_format][0]
+    with Image.open(source_path) as original:
+        image = original.copy()
+    # transparency steht sonst nur in image.info und ginge unten verloren
+    if "transparency" in image.info:
+        image = image.convert("RGBA")
+    icc_profile = image.info.get("icc_profile")
+    keep_icc_profile = None
+    if icc_profile:
+        try:
+            image = convert_to_srgb(image, icc_profile)
+        except Exception as e:
+            print(f"Farbprofil von {source_path} konnte nicht umgerechnet werden, bleibt erhalten: {e}")
+            keep_icc_profile = icc_profile
+    if max_size:
+        image.thumbnail(tuple(max_size), Image.LANCZOS)
+    # Übrige Metadaten (EXIF, Text-Chunks) nicht übernehmen
+    image.info = {}
+
+    save_args = {}
+    if pil_format == "PNG":
+        save_args = {"optimize": True, "compress_level": 9}
+    elif lossless:
+        save_args = {"lossless": True}
+    else:
+        save_args = {"quality": quality}
+    if pil_format == "WEBP":
+        save_args["method"] = 6
+    if keep_icc_profile:
+        save_args["icc_profile"] = keep_icc_profile
+
+    temp_path = f"{target_path}.{os.getpid()}.part"
+    image.save(temp_path, pil_format, **save_args)
+    os.replace(temp_path, target_path)
+    return target_path
+
+
+class ImageTranscoder:
+    """
+    Optionale Aufbereitung vor dem Upload: maximale Auflösung, verlustfreie
+    PNG-Neukomprimierung oder WebP/AVIF, ohne Metadaten.
+
+    Ergebnisse werden pro Inhalts-Hash und Einstellungen unter
+    screenshots/.upload_cache/ abgelegt, sodass wiederholte Debriefs die
+    bereits kodierte Variante verwenden. Kodiert wird in einem Prozess-Pool,
+    der erst beim ersten Bedarf startet.
+    """
+
+    def __init__(self, max_size=None, image_format="png", quality=80, lossless=False, max_workers=None):
+        if image_format == "avif" and not features.check("avif"):
+            print("AVIF wird von dieser Pillow-Version nicht unterstützt, verwende WebP.")
+            image_format = "webp"
+        self.max_size = tuple(max_size) if max_size else None
+        self.image_format = image_format
+        self.quality = quality
+        self.lossless = lossless
+        self.max_workers = max_workers
+        self.settings_key = hashlib.blake2b(
+            repr((self.max_size, image_format, quality, lossless)).encode("utf-8"), digest_size=4
+        ).hexdigest()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, settings):
+        """
+        Erzeugt den Transcoder aus config.json["upload_transcode"], oder None wenn deaktiviert.
+        """
+        if not settings or not settings.get("enabled"):
+            return None
+        return cls(
+            max_size=settings.get("max_size"),
+            image_format=settings.get("format", "png"),
+            quality=settings.get("quality", 80),
+            lossless=settings.get("lossless", False),
+            max_workers=settings.get("workers"),
+        )
+
+    @property
+    def mime_type(self):
+        return FORMATS[self.image_format][2]
+
+    def prepare(self, source_path, content_hash):
+        """
+        Liefert (Pfad, MIME-Typ) der hochzuladenden Datei. Ist die kodierte Fassung
+        nicht kleiner als das Original, wird das Original verwendet.
+        """
+        cache_folder = os.path.join(os.path.dirname(source_path), UPLOAD_CACHE_FOLDER)
+        extension = FORMATS[self.image_format][1]
+        target_path = os.path.join(cache_folder, f"{content_hash}-{self.settings_key}{extension}")
+
+        if not os.path.exists(target_path):
+            os.makedirs(cache_folder, exist_ok=True)
+            future = self._get_executor().submit(
+                transcode_image, source_path, target_path,
+                self.max_size, self.image_format, self.quality, self.lossless,
+            )
+            future.result()
+
+        if os.path.getsize(target_path) >= os.path.getsize(source_path):
+            return source_path, screenshot_content_type(source_path)
+        return target_path, self.mime_type
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
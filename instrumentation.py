@@ -0,0 +1,198 @@
+"""
+Zeitmessung der Hot Paths (Refresh, Vorschaubilder, Dateiverschiebungen,
+Bemerkungen, HTTP-Aufrufe) mit Histogrammen und Zählern pro Vorgang.
+
+Standardmäßig aus; dann kostet ein Messpunkt nur eine Attributabfrage.
+Einschalten per Konfiguration ("instrumentation": true), Umgebungsvariable
+TRAINEE_MANAGER_INSTRUMENTATION=1, im Leistungs-Fenster (F12) oder mit
+--trace auf der Kommandozeile. Der Trace lässt sich im Chrome-Trace-Format
+exportieren (chrome://tracing bzw. https://ui.perfetto.dev).
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+ENV_VAR = "TRAINEE_MANAGER_INSTRUMENTATION"
+# Obergrenzen der Histogramm-Klassen (ms), alles darüber landet in der letzten Klasse
+BUCKET_BOUNDS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+# Anzahl der für den Trace aufbewahrten Messungen (die ältesten fallen heraus)
+MAX_TRACE_EVENTS = 20000
+
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+        for index, bound in enumerate(BUCKET_BOUNDS_MS):
+            if ms <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, fraction):
+        """
+        Obergrenze der Klasse, in die das Perzentil fällt (höchstens das Maximum).
+        """
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= target and bucket:
+                bound = BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+
+class NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+class Timer:
+    __slots__ = ("metrics", "name", "args", "start_ns")
+
+    def __init__(self, metrics, name, args):
+        self.metrics = metrics
+        self.name = name
+        self.args = args
+        self.start_ns = 0
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record(self.name, self.start_ns, time.perf_counter_ns(), self.args)
+        if exc_type is not None:
+            self.metrics.count(f"{self.name}.error")
+        return False
+
+
+class Instrumentation:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._trace = deque(maxlen=MAX_TRACE_EVENTS)
+        self._origin_ns = time.perf_counter_ns()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def timed(self, name, **args):
+        """
+        Kontextmanager, der die Dauer des Blocks unter name verbucht.
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return Timer(self, name, args or None)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def record(self, name, start_ns, end_ns, args=None):
+        thread = threading.current_thread()
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.add((end_ns - start_ns) / 1_000_000)
+            self._trace.append((name, start_ns, end_ns - start_ns, thread.ident, thread.name, args))
+
+    def snapshot(self):
+        """
+        Gibt ([{name, count, avg_ms, p50_ms, p95_ms, max_ms}], {Zähler: Wert}) zurück.
+        """
+        with self._lock:
+            rows = [
+                {
+                    "name": name,
+                    "count": histogram.count,
+                    "avg_ms": histogram.total_ms / histogram.count,
+                    "p50_ms": histogram.percentile(0.5),
+                    "p95_ms": histogram.percentile(0.95),
+                    "max_ms": histogram.max_ms,
+                }
+                for name, histogram in sorted(self._histograms.items())
+            ]
+            return rows, dict(sorted(self._counters.items()))
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._trace.clear()
+
+    def export_trace(self, path):
+        """
+        Schreibt die aufbewahrten Messungen und Zähler im Chrome-Trace-Format.
+        """
+        with self._lock:
+            trace = list(self._trace)
+            counters = dict(self._counters)
+        pid = os.getpid()
+        events, thread_names = [], {}
+        for name, start_ns, duration_ns, tid, thread_name, args in trace:
+            thread_names[tid] = thread_name
+            event = {
+                "name": name, "cat": name.split(".", 1)[0], "ph": "X", "pid": pid, "tid": tid,
+                "ts": (start_ns - self._origin_ns) / 1000, "dur": duration_ns / 1000,
+            }
+            if args:
+                event["args"] = {key: str(value) for key, value in args.items()}
+            events.append(event)
+        for tid, thread_name in thread_names.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"counters": counters}}, f)
+        return len(trace)
+
+
+metrics = Instrumentation(enabled=bool(os.environ.get(ENV_VAR)))
+
+
+def timed(name, **args):
+    return metrics.timed(name, **args)
+
+
+def count(name, value=1):
+    metrics.count(name, value)
+
+
+def instrumented(name):
+    """
+    Dekorator: misst jeden Aufruf der Funktion unter name.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            with Timer(metrics, name, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,147 @@
+import queue
+import threading
+import time
+import uuid
+
+from api_client import post_sync
+from upload_engine import create_session
+
+RECONNECT_BACKOFF = 0.5
+MAX_RECONNECT_BACKOFF = 5.0
+# Gewichtung des neuesten Messwerts im gleitenden Latenz-Mittelwert
+LATENCY_SMOOTHING = 0.2
+
+
+class LiveSyncClient:
+    """
+    Hält während eines Debriefs eine Keep-Alive-Verbindung zu /sync offen.
+
+    send() blockiert nie: Es merkt sich nur den neuesten Wert für
+    "current_screenshot". Schnelle Wechsel werden so zusammengefasst, der
+    Hintergrund-Thread sendet immer nur den zuletzt gewählten Screenshot. Bei
+    Verbindungsfehlern wird mit Backoff eine neue Session aufgebaut und der
+    (dann aktuellste) Wert erneut gesendet.
+
+    Ergebnisse landen als ("sent", value, latency_ms) bzw. ("failed", value, reason)
+    und Statusmeldungen als ("status", text) in der Queue events.
+
+    Mit outbox wird der jeweils letzte Wert zusätzlich dauerhaft vermerkt
+    (ein Eintrag pro Training), sodass er nach einem Abbruch nachgeholt wird.
+    Jeder Wert bekommt einen eigenen Idempotency-Key, damit der Server einen
+    neuen Wechsel nicht als Wiederholung des vorherigen verwirft.
+    """
+
+    def __init__(self, api_base_url, training_id, outbox=None):
+        self.api_base_url = api_base_url
+        self.training_id = training_id
+        self.outbox = outbox
+        # Outbox-Eintrag pro Training: ein neuer Wert ersetzt den überholten
+        self.outbox_key = f"sync:{training_id}"
+        self.events = queue.Queue()
+        self.last_latency_ms = None
+        self.avg_latency_ms = None
+        self._pending = None
+        self._has_pending = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closing = threading.Event()
+        self._session = create_session(pool_size=1)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def send(self, value):
+        with self._lock:
+            self._pending = value
+            self._has_pending = True
+        self._wakeup.set()
+
+    def close(self):
+        # Ein noch ausstehender Wert (z.B. DEBRIEFENDE) wird vor dem Beenden noch gesendet
+        self._closing.set()
+        self._wakeup.set()
+
+    def _take_pending(self):
+        with self._lock:
+            if not self._has_pending:
+                return False, None
+            value = self._pending
+            self._has_pending = False
+            return True, value
+
+    def _requeue(self, value):
+        # Nur erneut senden, wenn inzwischen kein neuerer Wert gewählt wurde
+        with self._lock:
+            if not self._has_pending:
+                self._pending = value
+                self._has_pending = True
+
+    def _run(self):
+        backoff = RECONNECT_BACKOFF
+        try:
+            while True:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                while True:
+                    has_value, value = self._take_pending()
+                    if not has_value:
+                        break
+                    if self._post(value):
+                        backoff = RECONNECT_BACKOFF
+                    elif self._closing.is_set():
+                        # Beim Schließen nicht endlos neu verbinden
+                        break
+                    else:
+                        self._requeue(value)
+                        self.events.put(("status", f"Verbindung getrennt, neuer Versuch in {backoff:.1f} s"))
+                        self._closing.wait(backoff)
+                        backoff = min(backoff * 2, MAX_RECONNECT_BACKOFF)
+                        self._reconnect()
+                if self._closing.is_set():
+                    break
+        finally:
+            self._session.close()
+
+    def _post(self, value):
+        """
+        Gibt False nur bei Verbindungsfehlern zurück (dann wird neu verbunden).
+        """
+        idempotency_key = f"sync:{self.training_id}:{uuid.uuid4().hex}"
+        payload = {
+            "api_base_url": self.api_base_url, "training_id": self.training_id, "current_screenshot": value,
+            "idempotency_key": idempotency_key,
+        }
+        self._outbox_call("put", self.outbox_key, "sync", payload)
+
+        start = time.perf_counter()
+        try:
+            response = post_sync(self._session, self.api_base_url, self.training_id, value, idempotency_key)
+        except Exception as e:
+            print(f"Fehler beim Live-Sync von {value}: {e}")
+            return False
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.last_latency_ms = latency_ms
+        if self.avg_latency_ms is None:
+            self.avg_latency_ms = latency_ms
+        else:
+            self.avg_latency_ms += LATENCY_SMOOTHING * (latency_ms - self.avg_latency_ms)
+
+        if response.status_code == 200:
+            self._outbox_call("done", self.outbox_key, payload)
+            self.events.put(("sent", value, latency_ms))
+        else:
+            self.events.put(("failed", value, response.status_code))
+        return True
+
+    def _outbox_call(self, method, *args):
+        # Die Outbox kann beim Beenden schon geschlossen sein; der Wert wird trotzdem gesendet
+        if not self.outbox:
+            return
+        try:
+            getattr(self.outbox, method)(*args)
+        except Exception as e:
+            print(f"Fehler beim Vermerken des Live-Syncs in der Outbox: {e}")
+
+    def _reconnect(self):
+        self._session.close()
+        self._session = create_session(pool_size=1)
@@ -1,7 +1,31 @@
-import tkinter as tk
-from trainee_manager import TraineeManagerApp
+import multiprocessing
+import os
+import sys
+import time
+
+# Von benchmarks/startup.py gesetzt: Zeit bis zum ersten Fenster ausgeben und beenden
+STARTUP_BENCHMARK_ENV = "TRAINEE_MANAGER_STARTUP_BENCHMARK"
 
 if __name__ == "__main__":
-    app = TraineeManagerApp()
+    start_time = time.perf_counter()
+    # Nötig für die Prozess-Pools (Transcoding, Berichte) in der gepackten .exe
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        # Kommandozeile: ohne Tk und python-docx starten
+        from cli import main
+        sys.exit(main())
+
+    # Konfiguration lesen, während Tk und die App-Module importiert werden
+    from utils import load_config_async
+    config_future = load_config_async()
+    from trainee_manager import TraineeManagerApp
+    app = TraineeManagerApp(config_future.result())
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
+
+    if os.environ.get(STARTUP_BENCHMARK_ENV):
+        def report_first_frame():
+            print(f"first_frame_ms={(time.perf_counter() - start_time) * 1000:.1f}", flush=True)
+            app.after(200, app.on_closing)
+        app.after_idle(report_first_frame)
+
     app.mainloop()
@@ -0,0 +1,282 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from api_client import post_sync, post_upload
+from screenshot_ingestion import screenshot_content_type
+from training_archive import EXTRACT_FOLDER, TrainingArchive, is_archived
+from training_store import TrainingStore
+
+OUTBOX_FILE = "outbox.db"
+# Zeit (s), die ein frisch eingetragener Vorgang dem direkten Versuch überlassen bleibt
+DIRECT_ATTEMPT_GRACE = 60
+BACKOFF_BASE = 5
+MAX_BACKOFF = 600
+# Nach so vielen Fehlversuchen wird ein Vorgang aufgegeben (dead = 1) und nicht mehr gesendet
+MAX_ATTEMPTS = 12
+DISPATCH_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    idempotency_key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    last_error TEXT,
+    dead INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS outbox_next_attempt ON outbox(next_attempt);
+"""
+
+
+class Outbox:
+    """
+    Dauerhafte Warteschlange aller API-Vorgänge (Uploads, Live-Sync).
+
+    Jeder Vorgang wird vor dem ersten Versuch mit einem Idempotency-Key
+    eingetragen und erst nach Bestätigung durch den Server entfernt. Was beim
+    direkten Versuch scheitert (oder bei einem Absturz offen bleibt), sendet der
+    OutboxDispatcher später erneut. Gleicher Key ersetzt den alten Eintrag, so
+    bleibt z.B. pro Training nur der letzte Live-Sync-Wert stehen. Nach
+    MAX_ATTEMPTS Fehlversuchen oder wenn der Screenshot nicht mehr existiert,
+    bleibt ein Vorgang als aufgegeben (dead) zur Ansicht liegen, bis er
+    verworfen wird.
+
+    Wird von mehreren Threads genutzt, daher eine Verbindung hinter einem Lock.
+    """
+
+    def __init__(self, path=OUTBOX_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def put(self, idempotency_key, kind, payload, delay=DIRECT_ATTEMPT_GRACE):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO outbox (idempotency_key, kind, payload, attempts, next_attempt) "
+                "VALUES (?, ?, ?, 0, ?) ON CONFLICT(idempotency_key) DO UPDATE SET "
+                "kind = excluded.kind, payload = excluded.payload, attempts = 0, "
+                "next_attempt = excluded.next_attempt, last_error = NULL, dead = 0",
+                (idempotency_key, kind, json.dumps(payload, sort_keys=True), time.time() + delay),
+            )
+
+    def put_if_absent(self, idempotency_key, kind, payload, delay=DIRECT_ATTEMPT_GRACE):
+        """
+        Wie put(), lässt aber einen vorhandenen Eintrag samt Fehlversuchen und Backoff unverändert.
+        """
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO outbox (idempotency_key, kind, payload, attempts, next_attempt) "
+                "VALUES (?, ?, ?, 0, ?) ON CONFLICT(idempotency_key) DO NOTHING",
+                (idempotency_key, kind, json.dumps(payload, sort_keys=True), time.time() + delay),
+            )
+
+    def done(self, idempotency_key, payload=None):
+        """
+        Entfernt den Vorgang. Mit payload nur, wenn der Eintrag nicht inzwischen ersetzt wurde.
+        """
+        with self._lock, self.conn:
+            if payload is None:
+                self.conn.execute("DELETE FROM outbox WHERE idempotency_key = ?", (idempotency_key,))
+            else:
+                self.conn.execute(
+                    "DELETE FROM outbox WHERE idempotency_key = ? AND payload = ?",
+                    (idempotency_key, json.dumps(payload, sort_keys=True)),
+                )
+
+    def discard_prefix(self, prefix):
+        """
+        Entfernt alle Vorgänge, deren Key mit prefix beginnt (z.B. alle Uploads eines gelöschten Screenshots).
+        """
+        with self._lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM outbox WHERE substr(idempotency_key, 1, ?) = ?", (len(prefix), prefix)
+            )
+
+    def failed(self, idempotency_key, error):
+        """
+        Vermerkt einen Fehlversuch. Gibt True zurück, wenn der Vorgang damit aufgegeben wurde.
+        """
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT attempts FROM outbox WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+            if row is None:
+                return False
+            attempts = row[0] + 1
+            delay = min(BACKOFF_BASE * (2 ** (attempts - 1)), MAX_BACKOFF)
+            dead = attempts >= MAX_ATTEMPTS
+            self.conn.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ?, dead = ? WHERE idempotency_key = ?",
+                (attempts, time.time() + delay, str(error), int(dead), idempotency_key),
+            )
+            return dead
+
+    def give_up(self, idempotency_key, error):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE outbox SET dead = 1, next_attempt = ?, last_error = ? WHERE idempotency_key = ?",
+                (time.time(), str(error), idempotency_key),
+            )
+
+    def discard_dead(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM outbox WHERE dead = 1")
+
+    def due(self, limit=20):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT idempotency_key, kind, payload FROM outbox WHERE dead = 0 AND next_attempt <= ? "
+                "ORDER BY next_attempt LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+        return [(key, kind, json.loads(payload)) for key, kind, payload in rows]
+
+    def status(self):
+        """
+        (offene Vorgänge, davon bereits fehlgeschlagen, aufgegebene Vorgänge, letzter Fehler).
+        """
+        with self._lock:
+            pending, failed, dead = self.conn.execute(
+                "SELECT COALESCE(SUM(dead = 0), 0), COALESCE(SUM(dead = 0 AND attempts > 0), 0), "
+                "COALESCE(SUM(dead), 0) FROM outbox"
+            ).fetchone()
+            row = self.conn.execute(
+                "SELECT last_error FROM outbox WHERE last_error IS NOT NULL "
+                "ORDER BY dead DESC, next_attempt DESC LIMIT 1"
+            ).fetchone()
+        return pending, failed, dead, row[0] if row else None
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class UploadSourceMissing(Exception):
+    pass
+
+
+def resolve_upload_source(payload):
+    """
+    (Pfad, MIME-Typ) der hochzuladenden Datei. Fehlt die vorbereitete Fassung
+    (z.B. Upload-Cache beim Archivieren entfernt), wird das unveränderte
+    Original verwendet, notfalls einzeln aus screenshots.zip entpackt.
+    """
+    if os.path.exists(payload["upload_path"]):
+        return payload["upload_path"], payload["metadata"].get("content_type")
+
+    filename = payload["metadata"]["filename"]
+    screenshot_folder = os.path.join(payload["base_folder"], "screenshots")
+    original_path = os.path.join(screenshot_folder, filename)
+    try:
+        stat = os.stat(original_path)
+        if (stat.st_size, stat.st_mtime_ns) == (payload["size"], payload["mtime_ns"]):
+            return original_path, screenshot_content_type(original_path)
+        raise UploadSourceMissing(f"{filename} wurde seit dem Upload-Versuch verändert")
+    except FileNotFoundError:
+        pass
+    if is_archived(payload["base_folder"]):
+        archive = TrainingArchive(payload["base_folder"])
+        try:
+            archived = archive.stat(filename)
+            if archived == (payload["mtime_ns"], payload["size"]):
+                extracted = archive.extract(filename, os.path.join(screenshot_folder, EXTRACT_FOLDER))
+                return extracted, screenshot_content_type(extracted)
+            if archived is not None:
+                raise UploadSourceMissing(f"{filename} wurde seit dem Upload-Versuch verändert")
+        finally:
+            archive.close()
+    raise UploadSourceMissing(f"{filename} ist nicht mehr vorhanden")
+
+
+def perform_upload(session, payload, idempotency_key):
+    upload_path, content_type = resolve_upload_source(payload)
+    response, _ = post_upload(
+        session, payload["api_base_url"], payload["training_id"], upload_path,
+        dict(payload["metadata"], content_type=content_type), payload.get("upload_mode", "stream"), idempotency_key,
+    )
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}")
+    # Im Upload-Ledger des Trainings als bestätigt vermerken
+    store = TrainingStore(payload["base_folder"])
+    try:
+        store.record_upload(
+            payload["training_id"], payload["metadata"]["filename"], payload["metadata"]["content_hash"],
+            payload["size"], payload["mtime_ns"],
+        )
+    finally:
+        store.close()
+
+
+def perform_sync(session, payload, idempotency_key):
+    # Der Outbox-Key gilt pro Training, der Request-Key pro gesendetem Wert
+    response = post_sync(
+        session, payload["api_base_url"], payload["training_id"], payload["current_screenshot"],
+        payload.get("idempotency_key", idempotency_key),
+    )
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}")
+
+
+OUTBOX_HANDLERS = {
+    "upload": perform_upload,
+    "sync": perform_sync,
+}
+
+
+class OutboxDispatcher:
+    """
+    Sendet fällige Outbox-Vorgänge im Hintergrund erneut, mit exponentiellem
+    Backoff pro Vorgang. Uploads, deren Screenshot nicht mehr existiert, werden
+    als aufgegeben markiert und in status() gemeldet.
+    Läuft unabhängig davon, ob ein ScreenshotManager offen ist.
+    """
+
+    def __init__(self, outbox):
+        self.outbox = outbox
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        from upload_engine import create_session
+
+        session = create_session(pool_size=1)
+        try:
+            while not self._stop_event.wait(DISPATCH_INTERVAL):
+                for key, kind, payload in self.outbox.due():
+                    if self._stop_event.is_set():
+                        break
+                    handler = OUTBOX_HANDLERS.get(kind)
+                    if handler is None:
+                        self._failed(key, f"Unbekannter Vorgang: {kind}")
+                        continue
+                    try:
+                        handler(session, payload, key)
+                        self.outbox.done(key, payload)
+                        print(f"Ausstehender Vorgang übertragen: {key}")
+                    except UploadSourceMissing as e:
+                        print(f"Vorgang aufgegeben: {key} ({e})")
+                        self.outbox.give_up(key, e)
+                    except Exception as e:
+                        self._failed(key, e)
+        finally:
+            session.close()
+
+    def _failed(self, key, error):
+        if self.outbox.failed(key, error):
+            print(f"Vorgang nach {MAX_ATTEMPTS} Fehlversuchen aufgegeben: {key} ({error})")
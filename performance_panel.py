@@ -0,0 +1,93 @@
+import time
+import tkinter as tk
+from tkinter import filedialog, ttk
+
+from instrumentation import metrics
+
+PANEL_REFRESH_INTERVAL = 1000
+COLUMNS = (
+    ("name", "Vorgang", 220),
+    ("count", "Anzahl", 70),
+    ("avg_ms", "Mittel (ms)", 90),
+    ("p50_ms", "p50 (ms)", 80),
+    ("p95_ms", "p95 (ms)", 80),
+    ("max_ms", "Max (ms)", 80),
+)
+
+
+def format_ms(value):
+    return "" if value is None else f"{value:.1f}"
+
+
+class PerformancePanel:
+    """
+    Debug-Fenster mit Latenzen und Zählern aus instrumentation.metrics.
+    Aktualisiert sich jede Sekunde, solange es offen ist.
+    """
+
+    def __init__(self, parent, on_close_callback=None):
+        self.on_close_callback = on_close_callback
+        self.window = tk.Toplevel(parent)
+        self.window.title("Leistung")
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        controls = tk.Frame(self.window)
+        controls.pack(fill="x", padx=10, pady=(10, 5))
+        self.enabled_var = tk.BooleanVar(value=metrics.enabled)
+        tk.Checkbutton(controls, text="Messung aktiv", variable=self.enabled_var, command=self.toggle).pack(side="left")
+        tk.Button(controls, text="Zurücksetzen", command=self.reset).pack(side="left", padx=5)
+        tk.Button(controls, text="Trace exportieren", command=self.export_trace).pack(side="left")
+        self.status_label = tk.Label(controls, text="", font=("Arial", 9))
+        self.status_label.pack(side="left", padx=10)
+
+        self.table = ttk.Treeview(self.window, columns=[key for key, _, _ in COLUMNS], show="headings", height=15)
+        for key, heading, width in COLUMNS:
+            self.table.heading(key, text=heading)
+            self.table.column(key, width=width, anchor="w" if key == "name" else "e")
+        self.table.pack(fill="both", expand=True, padx=10)
+
+        self.counters_label = tk.Label(self.window, text="", justify="left", anchor="w", font=("Arial", 9))
+        self.counters_label.pack(fill="x", padx=10, pady=(5, 10))
+
+        self.refresh()
+
+    def refresh(self):
+        rows, counters = metrics.snapshot()
+        self.table.delete(*self.table.get_children())
+        for row in rows:
+            self.table.insert("", tk.END, values=(
+                row["name"], row["count"], format_ms(row["avg_ms"]),
+                format_ms(row["p50_ms"]), format_ms(row["p95_ms"]), format_ms(row["max_ms"]),
+            ))
+        self.counters_label.config(text="  ".join(f"{name}: {value}" for name, value in counters.items()))
+        if not metrics.enabled:
+            self.status_label.config(text="Messung ausgeschaltet")
+        self.refresh_job = self.window.after(PANEL_REFRESH_INTERVAL, self.refresh)
+
+    def toggle(self):
+        metrics.enable(self.enabled_var.get())
+        self.status_label.config(text="")
+
+    def reset(self):
+        metrics.reset()
+        self.status_label.config(text="")
+
+    def export_trace(self):
+        path = filedialog.asksaveasfilename(
+            parent=self.window, title="Trace exportieren", defaultextension=".json",
+            initialfile=time.strftime("trace_%Y%m%d_%H%M%S.json"), filetypes=[("Chrome-Trace", "*.json")],
+        )
+        if not path:
+            return
+        try:
+            events = metrics.export_trace(path)
+            self.status_label.config(text=f"{events} Messungen exportiert")
+        except Exception as e:
+            print(f"Fehler beim Exportieren des Traces: {e}")
+            self.status_label.config(text=f"Export fehlgeschlagen: {e}")
+
+    def on_close(self):
+        self.window.after_cancel(self.refresh_job)
+        self.window.destroy()
+        if self.on_close_callback:
+            self.on_close_callback()
@@ -0,0 +1,196 @@
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from docx import Document
+from docx.shared import Cm, Pt
+from PIL import Image
+
+from screenshot_ingestion import is_screenshot_file, screenshot_timestamp
+from training_archive import TrainingArchive, is_archived
+from training_documents import TEMPLATE_PATH, iter_paragraphs, replace_in_paragraph
+from training_store import TrainingStore
+
+REPORT_SUFFIX = "_debrief_report.docx"
+# Maximale Kantenlänge (px) der eingebetteten Bilder und ihre Breite im Dokument
+REPORT_IMAGE_SIZE = (1280, 1280)
+REPORT_IMAGE_WIDTH = Cm(16)
+REPORT_JPEG_QUALITY = 80
+# Obergrenze je eingebettetem Bild; darüber wird mit geringerer Qualität bzw. kleiner neu kodiert
+REPORT_MAX_IMAGE_BYTES = 250_000
+REPORT_MIN_JPEG_QUALITY = 50
+
+
+def make_report_image(screenshot_path, max_size=REPORT_IMAGE_SIZE, max_bytes=REPORT_MAX_IMAGE_BYTES):
+    """
+    Verkleinerte JPEG-Fassung eines Screenshots als BytesIO, höchstens max_bytes
+    groß. Es ist immer nur ein Bild gleichzeitig dekodiert.
+    """
+    with Image.open(screenshot_path) as image:
+        image.draft("RGB", max_size)
+        image.thumbnail(max_size, Image.LANCZOS, reducing_gap=3.0)
+        image = image.convert("RGB")
+    quality = REPORT_JPEG_QUALITY
+    while True:
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=quality, optimize=True)
+        if buffer.tell() <= max_bytes:
+            break
+        if quality > REPORT_MIN_JPEG_QUALITY:
+            quality = max(quality - 15, REPORT_MIN_JPEG_QUALITY)
+        else:
+            image = image.resize((max(image.width // 2, 1), max(image.height // 2, 1)), Image.LANCZOS)
+    buffer.seek(0)
+    return buffer
+
+
+def add_heading(doc, text, level):
+    # Vorlagen aus einem deutschen Word haben keine Formatvorlage "Heading N"
+    if any(style.name == f"Heading {level}" for style in doc.styles):
+        return doc.add_heading(text, level=level)
+    paragraph = doc.add_paragraph()
+    run = paragraph.add_run(text)
+    run.bold = True
+    run.font.size = Pt(16 if level == 1 else 13)
+    return paragraph
+
+
+def export_training_report(training_folder, output_path=None, template_path=TEMPLATE_PATH):
+    """
+    Schreibt einen Debrief-Bericht mit allen Screenshots in Aufnahmereihenfolge,
+    Zeitpunkt, Bemerkung und Besprochen-Status. Kopf aus der Trainingsvorlage.
+    Läuft auch im Prozess-Pool, muss daher eine Funktion auf Modulebene sein.
+
+    Speicherbedarf O(n): python-docx hält alle eingebetteten JPEGs bis save()
+    im Speicher, je Bild höchstens REPORT_MAX_IMAGE_BYTES (200 Screenshots also
+    höchstens etwa 50 MB), dazu ein einziges dekodiertes Original.
+    """
+    training_folder = os.path.normpath(training_folder)
+    training_name = os.path.basename(training_folder)
+    output_path = output_path or os.path.join(training_folder, f"{training_name}{REPORT_SUFFIX}")
+    # Archivierte Bilder werden einzeln aus dem ZIP gelesen
+    archive = TrainingArchive(training_folder) if is_archived(training_folder) else None
+    try:
+        return write_report(training_folder, output_path, template_path, archive)
+    finally:
+        if archive:
+            archive.close()
+
+
+def write_report(training_folder, output_path, template_path, archive=None):
+    training_name = os.path.basename(training_folder)
+    trainee_name = os.path.basename(os.path.dirname(training_folder))
+    screenshot_folder = os.path.join(training_folder, "screenshots")
+
+    store = TrainingStore(training_folder)
+    try:
+        comments = store.load_comments()
+        capture_times, _ = store.get_capture_times()
+    finally:
+        store.close()
+
+    filenames = []
+    if os.path.isdir(screenshot_folder):
+        with os.scandir(screenshot_folder) as entries:
+            filenames = [entry.name for entry in entries if is_screenshot_file(entry.name) and entry.is_file()]
+    on_disk = set(filenames)
+    if archive:
+        capture_times = dict(archive.capture_times(), **capture_times)
+        filenames += [name for name in archive.entries if name not in on_disk]
+    timestamps = {name: screenshot_timestamp(screenshot_folder, name, capture_times) for name in filenames}
+    filenames.sort(key=lambda name: (timestamps[name], name))
+
+    if filenames:
+        date = timestamps[filenames[0]]
+    else:
+        date = datetime.fromtimestamp(os.stat(training_folder).st_ctime)
+    values = {"{Name}": trainee_name, "{Training}": training_name, "{Date}": date.strftime("%Y-%m-%d")}
+
+    if os.path.exists(template_path):
+        doc = Document(template_path)
+        for paragraph in list(iter_paragraphs(doc)):
+            replace_in_paragraph(paragraph, values)
+    else:
+        doc = Document()
+        doc.add_paragraph(f"{trainee_name} // {training_name} // {values['{Date}']}")
+
+    besprochen = comments.get("besprochen", set())
+    add_heading(doc, "Debrief-Bericht", 1)
+    doc.add_paragraph(
+        f"Screenshots: {len(filenames)} | Besprochen: {sum(1 for name in filenames if name in besprochen)}"
+    )
+
+    for number, filename in enumerate(filenames, start=1):
+        status = "besprochen" if filename in besprochen else "nicht besprochen"
+        add_heading(doc, f"{number}. {timestamps[filename].strftime('%Y-%m-%d %H:%M:%S')} ({status})", 2)
+        try:
+            source = os.path.join(screenshot_folder, filename) if filename in on_disk else archive.open(filename)
+            doc.add_picture(make_report_image(source), width=REPORT_IMAGE_WIDTH)
+        except Exception as e:
+            print(f"Fehler beim Einbetten von {filename}: {e}")
+            doc.add_paragraph(f"[Bild {filename} konnte nicht geladen werden]")
+        comment = comments.get("comments", {}).get(filename, "")
+        if comment:
+            doc.add_paragraph(comment)
+
+    temp_path = f"{output_path}.part"
+    doc.save(temp_path)
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+class ReportExporter:
+    """
+    Exportiert Debrief-Berichte im Hintergrund. Jeder Bericht entsteht in einem
+    eigenen Prozess; pro Prozess wird immer nur ein Bild dekodiert, in das
+    Dokument gelangen nur die verkleinerten, in der Größe begrenzten JPEGs
+    (siehe export_training_report). Mehrere Trainings eines Trainees werden
+    parallel exportiert.
+    """
+
+    def __init__(self, max_workers=None, template_path=TEMPLATE_PATH):
+        self.max_workers = max_workers
+        self.template_path = template_path
+        self._executor = None
+        self._coordinator = ThreadPoolExecutor(max_workers=1)
+        self._lock = threading.Lock()
+
+    def export(self, training_folder, output_path=None):
+        """
+        Future mit dem Pfad des Berichts.
+        """
+        return self._get_executor().submit(export_training_report, training_folder, output_path, self.template_path)
+
+    def export_trainee(self, trainee_path):
+        """
+        Future mit (geschriebene Pfade, fehlgeschlagene Trainings) für alle Trainings eines Trainees.
+        """
+        return self._coordinator.submit(self._export_all, trainee_path)
+
+    def _export_all(self, trainee_path):
+        with os.scandir(trainee_path) as entries:
+            trainings = sorted(entry.path for entry in entries if entry.is_dir())
+        futures = {self.export(training): training for training in trainings}
+        written, failed = [], []
+        for future in as_completed(futures):
+            try:
+                written.append(future.result())
+            except Exception as e:
+                print(f"Fehler beim Exportieren von {futures[future]}: {e}")
+                failed.append(futures[future])
+        return sorted(written), sorted(failed)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def shutdown(self):
+        self._coordinator.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
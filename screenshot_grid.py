@@ -0,0 +1,247 @@
+import os
+import queue
+import tkinter as tk
+
+from PIL import ImageTk
+
+from instrumentation import instrumented
+
+GRID_COLUMNS = 3
+CELL_WIDTH = 170
+ROW_HEIGHT = 230
+# Zusätzlich gerenderte Zeilen ober- und unterhalb des sichtbaren Bereichs
+OVERSCAN_ROWS = 1
+# Abfrageintervall für fertig dekodierte Vorschaubilder (ms)
+THUMBNAIL_POLL_INTERVAL = 50
+
+
+class ScreenshotCell:
+    """
+    Eine wiederverwendbare Zelle im Screenshot-Grid: Vorschaubild, Zeitstempel,
+    Status und Bemerkung. Beim Scrollen wird sie per bind() einem anderen
+    Screenshot zugeordnet, statt neue Widgets zu erzeugen.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.path = None
+        self.filename = None
+        self.thumb_key = None
+        self.besprochen = False
+        self.comment = ""
+        self.position = None
+
+        self.frame = tk.Frame(grid.canvas)
+        self.window_id = grid.canvas.create_window(0, 0, window=self.frame, anchor="n")
+
+        self.img_label = tk.Label(self.frame)
+        self.img_label.grid(row=0, column=0, padx=5, pady=5)
+
+        self.timestamp_label = tk.Label(
+            self.frame,
+            text="",
+            font=("Arial", 9, "bold"),
+            justify="center",
+        )
+        self.timestamp_label.grid(row=1, column=0, padx=5, pady=2)
+
+        self.status_label = tk.Label(
+            self.frame,
+            text="Besprochen",
+            font=("Arial", 9),
+            fg="green",
+            justify="center",
+        )
+
+        self.comment_label = tk.Label(
+            self.frame,
+            text="",
+            font=("Arial", 8),
+            justify="center",
+            wraplength=CELL_WIDTH - 10,
+        )
+
+        # Klick-Events binden
+        self.img_label.bind("<Button-1>", lambda e: grid.manager.on_click(self.path))
+        self.img_label.bind("<Double-1>", lambda e: grid.manager.on_double_click(self.path))
+        self.img_label.bind("<Button-3>", lambda e: grid.manager.show_context_menu(e, self.path))
+
+    def bind(self, path):
+        if path == self.path:
+            return
+        self.path = path
+        self.filename = os.path.basename(path)
+        self.set_placeholder()
+        timestamp_str = self.grid.manager.get_screenshot_timestamp(self.filename).strftime("%d.%m.%Y %H:%M:%S")
+        self.timestamp_label.config(text=timestamp_str)
+
+    def set_image(self, thumb_key, image):
+        photo = ImageTk.PhotoImage(image)
+        self.img_label.config(image=photo)
+        self.img_label.image = photo
+        self.thumb_key = thumb_key
+
+    def set_placeholder(self):
+        self.img_label.config(image=self.grid.placeholder)
+        self.img_label.image = self.grid.placeholder
+        self.thumb_key = None
+
+    def set_besprochen(self, besprochen):
+        if besprochen == self.besprochen:
+            return
+        self.besprochen = besprochen
+        if besprochen:
+            self.status_label.grid(row=2, column=0, padx=5, pady=2)
+        else:
+            self.status_label.grid_remove()
+
+    def set_comment(self, comment):
+        if comment == self.comment:
+            return
+        self.comment = comment
+        self.comment_label.config(text=comment)
+        if comment:
+            self.comment_label.grid(row=3, column=0, padx=5, pady=2)
+        else:
+            self.comment_label.grid_remove()
+
+    def set_position(self, idx):
+        if idx == self.position:
+            return
+        self.position = idx
+        x = idx % GRID_COLUMNS * CELL_WIDTH + CELL_WIDTH // 2
+        y = idx // GRID_COLUMNS * ROW_HEIGHT
+        self.grid.canvas.coords(self.window_id, x, y)
+        self.grid.canvas.itemconfigure(self.window_id, state="normal")
+
+    def hide(self):
+        self.position = None
+        self.grid.canvas.itemconfigure(self.window_id, state="hidden")
+
+    def destroy(self):
+        self.grid.canvas.delete(self.window_id)
+        self.frame.destroy()
+
+
+class ScreenshotGrid:
+    """
+    Virtualisiertes Screenshot-Grid auf einem Canvas.
+
+    Widgets existieren nur für die Zeilen im (bzw. knapp um den) sichtbaren
+    Bereich; Vorschaubilder werden auch nur für diese geladen. Beim Scrollen
+    werden Zellen, die aus dem Bild laufen, für neu sichtbare Screenshots
+    wiederverwendet. Der Aufwand beim Öffnen hängt damit nicht von der Anzahl
+    der Screenshots ab.
+
+    update() übernimmt nur den neuen Stand; render() aktualisiert danach nur
+    sichtbare Zellen, deren Bild, Status oder Bemerkung sich geändert hat.
+    """
+
+    def __init__(self, manager, canvas):
+        self.manager = manager
+        self.canvas = canvas
+        self.screenshots = []
+        self.besprochen = set()
+        self.comment_map = {}
+        self.cells = {}  # Index -> sichtbare Zelle
+        self.pool = []  # Ausgeblendete Zellen zur Wiederverwendung
+        self.poll_scheduled = False
+        # Platzhalter, bis das Vorschaubild im Hintergrund dekodiert ist
+        self.placeholder = tk.PhotoImage(width=150, height=84)
+        self.placeholder.put("#d9d9d9", to=(0, 0, 150, 84))
+
+        self.canvas.configure(width=GRID_COLUMNS * CELL_WIDTH)
+        self.canvas.bind("<Configure>", lambda e: self.render())
+
+    def update(self, screenshots, comments):
+        self.screenshots = list(screenshots)
+        self.besprochen = set(comments.get("besprochen", []))
+        self.comment_map = comments.get("comments", {})
+
+        rows = (len(self.screenshots) + GRID_COLUMNS - 1) // GRID_COLUMNS
+        self.canvas.configure(scrollregion=(0, 0, GRID_COLUMNS * CELL_WIDTH, rows * ROW_HEIGHT))
+        self.render()
+
+    def visible_range(self):
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), ROW_HEIGHT)
+        first_row = max(int(top // ROW_HEIGHT) - OVERSCAN_ROWS, 0)
+        last_row = int((top + height) // ROW_HEIGHT) + OVERSCAN_ROWS
+        first = first_row * GRID_COLUMNS
+        last = min((last_row + 1) * GRID_COLUMNS, len(self.screenshots))
+        return first, last
+
+    @instrumented("gallery.render")
+    def render(self):
+        first, last = self.visible_range()
+
+        # Zellen außerhalb des sichtbaren Bereichs freigeben
+        for idx in list(self.cells):
+            if not first <= idx < last:
+                cell = self.cells.pop(idx)
+                cell.hide()
+                self.pool.append(cell)
+
+        for idx in range(first, last):
+            screenshot_path = self.screenshots[idx]
+            cell = self.cells.get(idx)
+            if cell is None:
+                cell = self.pool.pop() if self.pool else ScreenshotCell(self)
+                self.cells[idx] = cell
+            try:
+                cell.bind(screenshot_path)
+                thumb_key = self.manager.thumbnail_cache.key_for(screenshot_path)
+                if thumb_key != cell.thumb_key:
+                    image = self.manager.thumbnail_cache.peek(thumb_key)
+                    if image is not None:
+                        cell.set_image(thumb_key, image)
+                    elif not self.manager.thumbnail_cache.has_failed(thumb_key):
+                        # Dekodieren im Hintergrund, Bild wird in poll_thumbnails() eingesetzt
+                        self.manager.thumbnail_loader.submit(screenshot_path, thumb_key)
+                        self.schedule_poll()
+            except Exception as e:
+                print(f"Error loading image {screenshot_path}: {e}")
+            cell.set_besprochen(cell.filename in self.besprochen)
+            cell.set_comment(self.comment_map.get(cell.filename, ""))
+            cell.set_position(idx)
+
+    def schedule_poll(self):
+        if not self.poll_scheduled:
+            self.poll_scheduled = True
+            self.canvas.after(THUMBNAIL_POLL_INTERVAL, self.poll_thumbnails)
+
+    def poll_thumbnails(self):
+        self.poll_scheduled = False
+        loader = self.manager.thumbnail_loader
+        visible = {cell.path: cell for cell in self.cells.values()}
+        while True:
+            try:
+                path, thumb_key, image = loader.results.get_nowait()
+            except queue.Empty:
+                break
+            cell = visible.get(path)
+            if cell is not None and image is not None and cell.thumb_key != thumb_key:
+                cell.set_image(thumb_key, image)
+        if loader.has_pending:
+            self.schedule_poll()
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.render()
+
+    def on_mousewheel(self, event):
+        self.canvas.yview_scroll(int(-event.delta / 120) or (-1 if event.delta > 0 else 1), "units")
+        self.render()
+
+    def scroll_units(self, units):
+        # X11 meldet das Mausrad als <Button-4>/<Button-5> statt <MouseWheel>
+        self.canvas.yview_scroll(units, "units")
+        self.render()
+
+    def clear(self):
+        for cell in list(self.cells.values()) + self.pool:
+            cell.destroy()
+        self.cells = {}
+        self.pool = []
+        self.screenshots = []
+        self.canvas.yview_moveto(0)
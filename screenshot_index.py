@@ -0,0 +1,63 @@
+import bisect
+import os
+
+from screenshot_ingestion import is_screenshot_file, screenshot_timestamp
+
+
+class ScreenshotIndex:
+    """
+    Screenshots eines Trainings im Speicher, sortiert nach Aufnahmezeitpunkt.
+
+    rescan() liest den Ordner einmal per scandir ein; danach halten add() und
+    remove() den Stand bei Übernahme bzw. Löschen aktuell, ohne den Ordner
+    erneut aufzulisten. Der neueste Screenshot steht immer am Ende (latest).
+    """
+
+    def __init__(self, screenshot_folder):
+        self.screenshot_folder = screenshot_folder
+        self.paths = []  # Sortiert nach (Aufnahmezeitpunkt, Dateiname)
+        self._keys = []  # Parallel zu paths, für bisect
+        self._entries = {}  # Dateiname -> Sortierschlüssel
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, filename):
+        return filename in self._entries
+
+    @property
+    def latest(self):
+        return self.paths[-1] if self.paths else None
+
+    def rescan(self, capture_times, archived=None):
+        """
+        Baut den Index vollständig neu auf (capture_times: {Dateiname: datetime}).
+        archived: {Dateiname: datetime} der Bilder, die nur noch im Archiv liegen.
+        """
+        entries = {filename: (captured_at, filename) for filename, captured_at in (archived or {}).items()}
+        with os.scandir(self.screenshot_folder) as scanned:
+            for entry in scanned:
+                if is_screenshot_file(entry.name) and entry.is_file():
+                    captured_at = screenshot_timestamp(self.screenshot_folder, entry.name, capture_times)
+                    entries[entry.name] = (captured_at, entry.name)
+        self._entries = entries
+        self._keys = sorted(entries.values())
+        self.paths = [os.path.join(self.screenshot_folder, filename) for _, filename in self._keys]
+
+    def add(self, filename, captured_at):
+        if filename in self._entries:
+            self.remove(filename)
+        key = (captured_at, filename)
+        index = bisect.bisect(self._keys, key)
+        self._keys.insert(index, key)
+        self.paths.insert(index, os.path.join(self.screenshot_folder, filename))
+        self._entries[filename] = key
+
+    def remove(self, filename):
+        key = self._entries.pop(filename, None)
+        if key is None:
+            return False
+        index = bisect.bisect_left(self._keys, key)
+        del self._keys[index]
+        del self.paths[index]
+        return True
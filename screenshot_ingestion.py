@@ -0,0 +1,205 @@
+import errno
+import itertools
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+
+from training_store import TrainingStore
+
+# Abstand zwischen zwei Größenprüfungen (s)
+POLL_INTERVAL = 0.1
+# Anzahl Prüfintervalle ohne Größenänderung, ab der eine Datei fertig geschrieben gilt
+STABLE_CHECKS = 2
+STABLE_INTERVAL = POLL_INTERVAL * STABLE_CHECKS
+# Dateien, die nach dieser Zeit (s) noch wachsen oder leer sind, werden verworfen
+STABLE_TIMEOUT = 30
+# Dateiendung -> MIME-Typ der Bildformate, die als Screenshot übernommen werden
+SCREENSHOT_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+}
+SCREENSHOT_EXTENSIONS = tuple(SCREENSHOT_TYPES)
+
+_sequence = itertools.count(1)
+_sequence_lock = threading.Lock()
+
+
+def make_screenshot_filename(captured_at, extension=".png"):
+    """
+    screenshot_<Datum>_<Uhrzeit>_<ms>_<Sequenz>.png, eindeutig auch bei mehreren Aufnahmen pro Sekunde.
+    """
+    with _sequence_lock:
+        sequence = next(_sequence)
+    timestamp = captured_at.strftime("%Y%m%d_%H%M%S")
+    return f"screenshot_{timestamp}_{captured_at.microsecond // 1000:03d}_{sequence:04d}{extension}"
+
+
+def claim_screenshot_filename(screenshot_folder, captured_at, extension=".png"):
+    """
+    Reserviert einen freien Namen per O_CREAT | O_EXCL als leere Platzhalter-Datei,
+    die anschließend per atomic_move ersetzt wird. So überschreiben sich auch
+    gleichzeitige Aufnahmen aus mehreren Quellen oder Prozessen nicht.
+    """
+    while True:
+        filename = make_screenshot_filename(captured_at, extension)
+        try:
+            fd = os.open(os.path.join(screenshot_folder, filename), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            continue
+        os.close(fd)
+        return filename
+
+
+def is_screenshot_file(filename):
+    return filename.lower().endswith(SCREENSHOT_EXTENSIONS)
+
+
+def screenshot_content_type(path):
+    return SCREENSHOT_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+
+
+def screenshot_timestamp(screenshot_folder, filename, capture_times):
+    """
+    Aufnahmezeitpunkt aus dem Index, sonst aus dem Dateinamen, sonst Änderungszeitpunkt.
+    """
+    captured_at = capture_times.get(filename)
+    if captured_at is not None:
+        return captured_at
+
+    # Ältere Screenshots: Timestamp aus dem Dateinamen extrahieren
+    filename_without_ext = os.path.splitext(filename)[0]
+    try:
+        timestamp = filename_without_ext.split("_")[1] + "_" + filename_without_ext.split("_")[2]
+        return datetime.strptime(timestamp, "%Y%m%d_%H%M%S")
+    except (IndexError, ValueError):
+        # Fremd benannte Datei -> Änderungszeitpunkt verwenden
+        return datetime.fromtimestamp(os.path.getmtime(os.path.join(screenshot_folder, filename)))
+
+
+def atomic_move(source_path, destination_path):
+    """
+    Verschiebt per os.replace (atomar auf demselben Dateisystem). Über
+    Laufwerksgrenzen wird erst in eine .part-Datei kopiert und diese dann
+    atomar umbenannt, sodass nie eine halbe Datei unter dem Zielnamen liegt.
+    """
+    try:
+        os.replace(source_path, destination_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        temp_path = destination_path + ".part"
+        shutil.copy2(source_path, temp_path)
+        os.replace(temp_path, destination_path)
+        os.remove(source_path)
+
+
+def record_capture(training_folder, filename, captured_at):
+    # Eigene Verbindung, da der Ingestor in einem eigenen Thread läuft
+    store = TrainingStore(training_folder)
+    try:
+        store.record_capture(filename, captured_at)
+    finally:
+        store.close()
+
+
+class PendingScreenshot:
+    def __init__(self, path, training_folder):
+        self.path = path
+        self.training_folder = training_folder
+        self.last_size = -1
+        self.last_change = time.monotonic()  # Zeitpunkt der letzten Größenänderung
+        self.closed = False
+        self.captured_at = datetime.now()
+        self.deadline = time.monotonic() + STABLE_TIMEOUT
+
+
+class ScreenshotIngestor:
+    """
+    Übernimmt neue Screenshots abseits des Watchdog-Threads.
+
+    Statt einer festen Wartezeit gilt eine Datei als fertig geschrieben, sobald
+    ein Close-Event kam (nur inotify) oder sich ihre Größe seit STABLE_INTERVAL
+    Sekunden nicht mehr geändert hat. Die wartenden Dateien werden unabhängig vom
+    Eintreffen neuer Events alle POLL_INTERVAL Sekunden in einem Durchlauf
+    geprüft, sodass sich Serienaufnahmen nicht gegenseitig ausbremsen. Erst wenn
+    keine Datei mehr wartet, wird der ganze Schwung einmal gemeldet
+    (service.on_screenshots_ingested).
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self.incoming = queue.Queue()
+        self.pending = {}
+        self.moved = []
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def submit(self, path, training_folder):
+        self.incoming.put(("created", path, training_folder))
+
+    def mark_closed(self, path):
+        self.incoming.put(("closed", path, None))
+
+    def _run(self):
+        next_check = time.monotonic() + POLL_INTERVAL
+        while not self._stop_event.is_set():
+            try:
+                event, path, training_folder = self.incoming.get(timeout=max(0.0, next_check - time.monotonic()))
+                self._handle_event(event, path, training_folder)
+            except queue.Empty:
+                pass
+
+            # Fester Takt: Events lösen keine zusätzliche Prüfung aus
+            now = time.monotonic()
+            if now < next_check:
+                continue
+            next_check = now + POLL_INTERVAL
+            self._check_pending(now)
+
+            if self.moved and not self.pending and self.incoming.empty():
+                moved, self.moved = self.moved, []
+                self.service.on_screenshots_ingested(moved)
+
+    def _handle_event(self, event, path, training_folder):
+        if event == "created":
+            self.pending.setdefault(path, PendingScreenshot(path, training_folder))
+        elif event == "closed" and path in self.pending:
+            self.pending[path].closed = True
+
+    def _check_pending(self, now):
+        for path, item in list(self.pending.items()):
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                # Datei wurde zwischenzeitlich entfernt oder umbenannt
+                del self.pending[path]
+                continue
+
+            if size != item.last_size:
+                item.last_size = size
+                item.last_change = now
+
+            if size > 0 and (item.closed or now - item.last_change >= STABLE_INTERVAL):
+                del self.pending[path]
+                destination_path = self.service.move_screenshot_to_training_folder(
+                    path, item.training_folder, item.captured_at
+                )
+                if destination_path:
+                    self.moved.append(destination_path)
+            elif now > item.deadline:
+                print(f"Screenshot wurde nicht fertig geschrieben, übersprungen: {path}")
+                del self.pending[path]
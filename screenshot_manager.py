@@ -1,57 +1,48 @@
-import base64
 import tkinter as tk
 from tkinter import simpledialog, messagebox
-from PIL import Image, ImageTk, ImageDraw
 import os
-import json
-import requests
-from datetime import datetime
+import queue
 import subprocess
+import threading
+from screenshot_grid import ScreenshotGrid
+from thumbnail_cache import ThumbnailCache, ThumbnailLoader
+from training_service import TrainingService
+from image_transcoder import ImageTranscoder
+from instrumentation import instrumented
+from live_sync import LiveSyncClient
+from training_archive import restore_training
 
 class ScreenshotManager:
-    def __init__(self, root, base_folder, training_id, api_base_url, on_close_callback=None):
+    def __init__(self, root, base_folder, training_id, api_base_url, on_close_callback=None,
+                 upload_mode="stream", thumbnail_workers=None, transcode_settings=None, outbox=None,
+                 report_exporter_factory=None):
         self.root = root
-        self.base_folder = base_folder
-        self.training_id = training_id
         self.api_base_url = api_base_url
-        self.screenshot_folder = os.path.join(base_folder, "screenshots")
-        self.comments_file = os.path.join(base_folder, "comments.json")
-        self.screenshots = []
-        self.comments = {}
+        self.thumbnail_workers = thumbnail_workers  # None = Anzahl CPU-Kerne
+        self.transcoder = ImageTranscoder.from_config(transcode_settings)  # None = Original hochladen
+        self.outbox = outbox  # Dauerhafte Warteschlange für fehlgeschlagene API-Vorgänge
+        # Erst beim Export aufgerufen, damit python-docx nicht schon beim Öffnen der Galerie geladen wird
+        self.report_exporter_factory = report_exporter_factory
+        # Daten und Uploads des Trainings, die Oberfläche liest nur daraus
+        self.training = TrainingService(
+            base_folder, training_id, api_base_url, upload_mode=upload_mode,
+            transcoder=self.transcoder, outbox=outbox,
+        )
         self.on_close_callback = on_close_callback
         self.debrief_active = False
-        self.last_screenshot_path = None
         self.double_click_detected = False
-        
-        os.makedirs(self.screenshot_folder, exist_ok=True)
-
-        self.load_screenshots()
-        self.load_comments()
+        self.upload_engine = None
+        self.live_sync = None
+        self.thumbnail_cache = ThumbnailCache(self.training.screenshot_folder, archive=self.training.archive)
+        self.thumbnail_loader = ThumbnailLoader(self.thumbnail_cache, max_workers=self.thumbnail_workers)
 
         self.create_gui()
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.root.bind("<Control-b>", lambda event: self.add_comment_to_last_screenshot())
 
-    def load_screenshots(self):
-        self.screenshots = [
-            os.path.join(self.screenshot_folder, f)
-            for f in os.listdir(self.screenshot_folder)
-            if f.endswith(".png")
-        ]
-        if self.screenshots:
-            self.last_screenshot_path = max(self.screenshots, key=os.path.getctime)
-
-    def load_comments(self):
-        if os.path.exists(self.comments_file):
-            with open(self.comments_file, "r") as f:
-                self.comments = json.load(f)
-        else:
-            self.comments = {"comments": {}, "besprochen": [], "live": ""}
-
-    def save_comments(self):
-        with open(self.comments_file, "w") as f:
-            json.dump(self.comments, f, indent=4)
+    def get_screenshot_timestamp(self, filename):
+        return self.training.get_screenshot_timestamp(filename)
 
     def create_gui(self):
         # Info-Leiste
@@ -60,7 +51,7 @@ class ScreenshotManager:
 
         self.info_label = tk.Label(
             self.info_frame,
-            text=f"Training ID: {self.training_id} | Screenshots: {len(self.screenshots)}",
+            text=f"Training ID: {self.training.training_id} | Screenshots: {len(self.training.screenshots)}",
             font=("Arial", 12, "bold"),
         )
         self.info_label.pack()
@@ -70,116 +61,64 @@ class ScreenshotManager:
         )
         self.debrief_button.pack(pady=5)
 
+        # Liest den Ordner komplett neu ein, z.B. nach Änderungen im Explorer
         self.refresh_button = tk.Button(
-            self.info_frame, text="Refresh", command=self.refresh
+            self.info_frame, text="Refresh", command=self.rescan
         )
         self.refresh_button.pack(pady=5)
 
-        # Scrollbarer Bereich
-        self.canvas = tk.Canvas(self.root)
-        self.scrollbar = tk.Scrollbar(self.root, orient="vertical", command=self.canvas.yview)
-        self.frame = tk.Frame(self.canvas)
+        if self.report_exporter_factory:
+            self.export_button = tk.Button(self.info_frame, text="Bericht exportieren", command=self.export_report)
+            self.export_button.pack(pady=5)
+
+        # Nur bei archivierten Trainings sichtbar
+        self.restore_button = tk.Button(self.info_frame, text="Archiv wiederherstellen", command=self.restore_archive)
 
-        self.frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
+        # Latenz des Live-Syncs, nur während eines Debriefs sichtbar
+        self.live_status_var = tk.StringVar()
+        self.live_status_label = tk.Label(self.info_frame, textvariable=self.live_status_var, font=("Arial", 9))
 
-        self.canvas.create_window((0, 0), window=self.frame, anchor="nw")
+        # Scrollbarer, virtualisierter Bereich
+        self.canvas = tk.Canvas(self.root)
+        self.grid = ScreenshotGrid(self, self.canvas)
+        self.scrollbar = tk.Scrollbar(self.root, orient="vertical", command=self.grid.yview)
         self.canvas.configure(yscrollcommand=self.scrollbar.set)
 
         self.canvas.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
 
+        self.root.bind("<MouseWheel>", self.grid.on_mousewheel)
+        self.root.bind("<Button-4>", lambda event: self.grid.scroll_units(-1))
+        self.root.bind("<Button-5>", lambda event: self.grid.scroll_units(1))
+        self.context_menu = tk.Menu(self.root, tearoff=0)
+
         self.display_screenshots()
 
     def display_screenshots(self):
-        # Vorhandene Widgets löschen
-        for widget in self.frame.winfo_children():
-            widget.destroy()
-
         # Info-Leiste aktualisieren
+        archived = " | archiviert" if self.training.archive else ""
         self.info_label.config(
-            text=f"Training ID: {self.training_id} | Screenshots: {len(self.screenshots)}"
+            text=f"Training ID: {self.training.training_id} | Screenshots: {len(self.training.screenshots)}{archived}"
         )
+        if self.training.archive:
+            self.restore_button.pack(pady=5)
+        else:
+            self.restore_button.pack_forget()
 
-        # Liste der besprochenen Screenshots
-        besprochen = set(self.comments.get("besprochen", []))
-
-        # Screenshots anzeigen
-        for idx, screenshot_path in enumerate(self.screenshots):
-            try:
-                # Screenshot laden
-                image = Image.open(screenshot_path)
-                image.thumbnail((150, 150))
-                photo = ImageTk.PhotoImage(image)
-
-                # Grid-Position berechnen
-                row = idx // 3 * 4  # Jede Gruppe von 3 Bildern benötigt 4 Zeilen
-                col = idx % 3
-
-                filename = os.path.basename(screenshot_path)
-                is_besprochen = filename in besprochen
-
-                # Timestamp aus dem Dateinamen extrahieren
-                filename_without_ext = os.path.splitext(filename)[0]
-                timestamp = filename_without_ext.split("_")[1] + "_" + filename_without_ext.split("_")[2]
-                timestamp_str = datetime.strptime(timestamp, "%Y%m%d_%H%M%S").strftime("%d.%m.%Y %H:%M:%S")
-
-                # Screenshot anzeigen
-                img_label = tk.Label(self.frame, image=photo)
-                img_label.image = photo
-                img_label.grid(row=row, column=col, padx=5, pady=5)
-
-                # Timestamp anzeigen
-                timestamp_label = tk.Label(
-                    self.frame,
-                    text=timestamp_str,
-                    font=("Arial", 9, "bold"),
-                    justify="center",
-                )
-                timestamp_label.grid(row=row + 1, column=col, padx=5, pady=2)
-
-                # Status anzeigen (falls vorhanden)
-                if is_besprochen:
-                    status_label = tk.Label(
-                        self.frame,
-                        text="Besprochen",
-                        font=("Arial", 9),
-                        fg="green",
-                        justify="center",
-                    )
-                    status_label.grid(row=row + 2, column=col, padx=5, pady=2)
-
-                # Bemerkung anzeigen (falls vorhanden)
-                comment = self.comments.get("comments", {}).get(filename, "")
-                if comment:
-                    comment_label = tk.Label(
-                        self.frame,
-                        text=comment,
-                        font=("Arial", 8),
-                        justify="center",
-                    )
-                    comment_label.grid(row=row + 3, column=col, padx=5, pady=2)
-
-                # Kontextmenü für Aktionen
-                context_menu = tk.Menu(self.root, tearoff=0)
-                if self.debrief_active:
-                    context_menu.add_command(label="Manuell hochladen", command=lambda path=screenshot_path: self.upload_screenshot(path))
-                    context_menu.add_command(label="Live schalten", command=lambda path=screenshot_path: self.sync_screenshot(path))
-
-                context_menu.add_command(label="Bemerkung bearbeiten", command=lambda path=screenshot_path: self.add_comment(path))
-                context_menu.add_command(label="Screenshot löschen", command=lambda path=screenshot_path: self.delete_screenshot(path))
-
-                def show_context_menu(event, menu=context_menu):
-                    menu.post(event.x_root, event.y_root)
-
-                # Klick-Events binden
-                img_label.bind("<Button-1>", lambda e, path=screenshot_path: self.on_click(path))
-                img_label.bind("<Double-1>", lambda e, path=screenshot_path: self.on_double_click(path))
-                img_label.bind("<Button-3>", show_context_menu)
-
-            except Exception as e:
-                print(f"Error loading image {screenshot_path}: {e}")
+        # Nur Änderungen gegenüber dem aktuellen Grid anwenden
+        self.grid.update(self.training.screenshots, self.training.comments)
 
+    def show_context_menu(self, event, screenshot_path):
+        # Ein gemeinsames Kontextmenü, das beim Öffnen neu befüllt wird
+        self.context_menu.delete(0, tk.END)
+        if self.debrief_active:
+            self.context_menu.add_command(label="Manuell hochladen", command=lambda: self.training.upload_screenshot(screenshot_path))
+            self.context_menu.add_command(label="Live schalten", command=lambda: self.sync_screenshot(screenshot_path))
 
+        self.context_menu.add_command(label="Bemerkung bearbeiten", command=lambda: self.add_comment(screenshot_path))
+        if not self.training.is_archived_screenshot(screenshot_path):
+            self.context_menu.add_command(label="Screenshot löschen", command=lambda: self.delete_screenshot(screenshot_path))
+        self.context_menu.post(event.x_root, event.y_root)
 
     def on_click(self, path):
         """
@@ -198,7 +137,7 @@ class ScreenshotManager:
         self.root.after(300, lambda: setattr(self, "double_click_detected", False))
     def add_comment(self, screenshot_path):
         filename = os.path.basename(screenshot_path)
-        current_comment = self.comments.get("comments", {}).get(filename, "")
+        current_comment = self.training.comments.get("comments", {}).get(filename, "")
 
         comment = simpledialog.askstring(
             "Bemerkung bearbeiten",
@@ -206,24 +145,20 @@ class ScreenshotManager:
             initialvalue=current_comment,
         )
         if comment is not None:  # Nicht abbrechen
-            if "comments" not in self.comments:
-                self.comments["comments"] = {}
-
-            # Bemerkung speichern
-            self.comments["comments"][filename] = comment
-            self.save_comments()
+            self.training.set_comment(filename, comment)
             self.refresh()
 
     def add_comment_to_last_screenshot(self):
-        if not self.last_screenshot_path:
+        if not self.training.last_screenshot_path:
             messagebox.showinfo("Keine Screenshots", "Es wurde noch kein Screenshot gemacht.")
             return
 
-        self.add_comment(self.last_screenshot_path)
+        self.add_comment(self.training.last_screenshot_path)
 
     def delete_screenshot(self, screenshot_path):
         try:
-            os.remove(screenshot_path)
+            self.training.delete_screenshot(screenshot_path)
+            self.thumbnail_cache.discard(screenshot_path)
             print(f"Screenshot gelöscht: {screenshot_path}")
             self.refresh()
         except Exception as e:
@@ -234,6 +169,8 @@ class ScreenshotManager:
         Öffnet den Screenshot in Paint zur Bearbeitung.
         """
         try:
+            # Archivierte Screenshots werden dafür einzeln entpackt
+            screenshot_path = self.training.local_path(screenshot_path)
             # Paint starten mit dem Screenshot
             subprocess.run(["mspaint", screenshot_path], check=True)
             print(f"Screenshot wurde in Paint geöffnet: {screenshot_path}")
@@ -244,8 +181,45 @@ class ScreenshotManager:
             print(f"Fehler beim Öffnen von Paint: {e}")
             messagebox.showerror("Fehler", "Paint konnte nicht gestartet werden.")
         
+    @instrumented("gallery.refresh")
     def refresh(self):
-        self.load_screenshots()
+        # Der Index ist bereits aktuell, nur die Anzeige nachziehen
+        self.display_screenshots()
+
+    def rescan(self):
+        self.training.load_screenshots()
+        self.display_screenshots()
+
+    def add_screenshots(self, paths):
+        if self.training.add_screenshots(paths):
+            self.display_screenshots()
+
+    def forget_screenshot(self, screenshot_path):
+        if self.training.forget_screenshot(screenshot_path):
+            self.thumbnail_cache.discard(screenshot_path)
+            self.display_screenshots()
+
+    def set_training(self, base_folder, training_id, reload=False):
+        """
+        Wechselt zu einem anderen Training. Nur hier wird das Grid komplett neu aufgebaut.
+        """
+        if not reload and base_folder == self.training.base_folder and training_id == self.training.training_id:
+            self.refresh()
+            return
+        self.stop_live_sync()
+        self.debrief_active = False
+        self.debrief_button.config(text="Debrief starten")
+        upload_mode = self.training.upload_mode
+        self.training.close()
+        self.training = TrainingService(
+            base_folder, training_id, self.api_base_url, upload_mode=upload_mode,
+            transcoder=self.transcoder, outbox=self.outbox,
+        )
+
+        self.thumbnail_loader.shutdown()
+        self.thumbnail_cache = ThumbnailCache(self.training.screenshot_folder, archive=self.training.archive)
+        self.thumbnail_loader = ThumbnailLoader(self.thumbnail_cache, max_workers=self.thumbnail_workers)
+        self.grid.clear()
         self.display_screenshots()
         
     def toggle_debrief(self):
@@ -255,35 +229,71 @@ class ScreenshotManager:
             self.start_debrief()
 
     def start_debrief(self):
-        total_screenshots = len(self.screenshots)
-        if total_screenshots == 0:
+        if len(self.training.screenshots) == 0:
             messagebox.showinfo("Keine Screenshots", "Es gibt keine Screenshots zum Hochladen.")
             return
+        if self.training.archive:
+            messagebox.showinfo(
+                "Archiviertes Training", "Bitte das Archiv zuerst wiederherstellen, um Screenshots hochzuladen."
+            )
+            return
         self.debrief_active = True
         self.debrief_button.config(text="Debrief beenden")
-        
+        self.start_live_sync()
+
+        # Bereits bestätigte, unveränderte Screenshots nicht erneut senden
+        pending_uploads = self.training.get_pending_uploads()
+        total_screenshots = len(pending_uploads)
+        skipped = len(self.training.screenshots) - total_screenshots
+
         progress_window = tk.Toplevel(self.root)
         progress_window.title("Debrief Fortschritt")
 
-        progress_label = tk.Label(progress_window, text="Hochladen...")
+        progress_label = tk.Label(progress_window, text=f"Hochladen... (0/{total_screenshots})")
         progress_label.pack(pady=10)
 
+        if skipped:
+            skipped_label = tk.Label(progress_window, text=f"{skipped} Screenshot(s) bereits hochgeladen")
+            skipped_label.pack()
+
         progress_bar = tk.Scale(progress_window, from_=0, to=total_screenshots, orient="horizontal", length=300)
         progress_bar.pack(pady=10)
 
         link_label = tk.Label(progress_window, text="", font=("Arial", 10, "bold"))
         link_label.pack(pady=10)
 
-        def upload_all():
-            for idx, screenshot_path in enumerate(self.screenshots):
-                success = self.upload_screenshot(screenshot_path)
-                if success:
-                    progress_bar.set(idx + 1)
+        live_status_label = tk.Label(progress_window, textvariable=self.live_status_var, font=("Arial", 9))
+        live_status_label.pack(pady=(0, 10))
+
+        # Uploads laufen im Hintergrund, der Tk-Thread fragt nur die Queue ab
+        engine = self.training.create_upload_engine()
+        self.upload_engine = engine
+
+        cancel_button = tk.Button(progress_window, text="Abbrechen", command=engine.cancel)
+        cancel_button.pack(pady=5)
+
+        done = [0]
+
+        def on_finished(uploaded, failed, cancelled):
+            self.upload_engine = None
+            if not progress_window.winfo_exists():
+                return
+            cancel_button.destroy()
+
+            if cancelled:
+                progress_label.config(text=f"Hochladen abgebrochen ({len(uploaded)}/{total_screenshots})")
+            else:
+                progress_label.config(text="Hochladen abgeschlossen!")
+
+            if failed and not cancelled:
+                # Kein Dialog pro Fehler: die Uploads liegen in der Outbox und werden automatisch wiederholt
+                if self.outbox:
+                    text = f"{len(failed)} Screenshot(s) in der Warteschlange, werden automatisch erneut gesendet"
                 else:
-                    messagebox.showerror("Upload-Fehler", f"Fehler beim Hochladen von {os.path.basename(screenshot_path)}")
+                    text = f"{len(failed)} Screenshot(s) konnten nicht hochgeladen werden"
+                tk.Label(progress_window, text=text, fg="red").pack()
 
-            progress_label.config(text="Hochladen abgeschlossen!")
-            training_link = f"http://localhost:3000/vatsim/traineemanager/training/{self.training_id}"
+            training_link = f"http://localhost:3000/vatsim/traineemanager/training/{self.training.training_id}"
             link_label.config(text=f"Link: {training_link}")
 
             def copy_link():
@@ -294,8 +304,32 @@ class ScreenshotManager:
 
             copy_button = tk.Button(progress_window, text="Link kopieren", command=copy_link)
             copy_button.pack(pady=5)
-            
-        self.root.after(100, upload_all)
+
+        def poll_progress():
+            while True:
+                try:
+                    event = engine.events.get_nowait()
+                except queue.Empty:
+                    break
+                if event[0] == "progress":
+                    done[0] += 1
+                    if progress_window.winfo_exists():
+                        progress_bar.set(done[0])
+                        progress_label.config(text=f"Hochladen... ({done[0]}/{total_screenshots})")
+                elif event[0] == "finished":
+                    on_finished(*event[1:])
+                    return
+            self.root.after(100, poll_progress)
+
+        # Schließen des Fensters bricht den Upload ab
+        def on_progress_close():
+            engine.cancel()
+            progress_window.destroy()
+
+        progress_window.protocol("WM_DELETE_WINDOW", on_progress_close)
+
+        engine.start(pending_uploads)
+        self.root.after(100, poll_progress)
         self.refresh()
 
     def end_debrief(self):
@@ -303,57 +337,107 @@ class ScreenshotManager:
         self.debrief_button.config(text="Debrief starten")
 
         # Signal senden, dass das Debrief beendet ist
-        url = f"{self.api_base_url}/api/Vatsim/traineemanager/training/{self.training_id}/sync"
-        try:
-            response = requests.post(url, json={"current_screenshot": "DEBRIEFENDE"})
-            if response.status_code == 200:
-                print("Debrief beendet, Signal gesendet.")
-            else:
-                print(f"Fehler beim Senden des Debrief-Ende-Signals: {response.status_code}")
-        except Exception as e:
-            print(f"Fehler beim Senden des Debrief-Ende-Signals: {e}")
+        if self.live_sync:
+            self.live_sync.send("DEBRIEFENDE")
 
         self.refresh()
-         
-    def upload_screenshot(self, screenshot_path):
-        url = f"{self.api_base_url}/api/Vatsim/traineemanager/training/{self.training_id}/upload"
-        filename = os.path.basename(screenshot_path)
 
+    def start_live_sync(self):
+        if self.live_sync is None:
+            self.live_sync = LiveSyncClient(self.api_base_url, self.training.training_id, outbox=self.outbox)
+            self.live_status_var.set("Live-Sync verbunden")
+            self.live_status_label.pack(pady=(0, 5))
+            self.root.after(100, self.poll_live_sync)
+
+    def stop_live_sync(self):
+        if self.live_sync:
+            self.live_sync.close()
+            self.live_sync = None
+            self.live_status_label.pack_forget()
+
+    def poll_live_sync(self):
+        client = self.live_sync
+        if client is None:
+            return
+        while True:
+            try:
+                event = client.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "sent":
+                _, filename, latency_ms = event
+                self.live_status_var.set(
+                    f"Live-Sync: {latency_ms:.0f} ms (Ø {client.avg_latency_ms:.0f} ms)"
+                )
+                if filename == "DEBRIEFENDE":
+                    print("Debrief beendet, Signal gesendet.")
+                    continue
+                print(f"Screenshot live geschaltet: {filename}")
+                self.training.mark_live(filename)
+                self.refresh()
+            elif event[0] == "failed":
+                _, filename, status_code = event
+                print(f"Fehler beim Live-Schalten von {filename}: {status_code}")
+                self.live_status_var.set(f"Live-Sync: Fehler {status_code}")
+            elif event[0] == "status":
+                self.live_status_var.set(f"Live-Sync: {event[1]}")
+        self.root.after(100, self.poll_live_sync)
+
+    def export_report(self):
+        self.export_button.config(state=tk.DISABLED, text="Bericht wird exportiert...")
+        future = self.report_exporter_factory().export(self.training.base_folder)
+        future.add_done_callback(lambda f: self.root.after(0, self.on_report_exported, f))
+
+    def on_report_exported(self, future):
+        if not self.root.winfo_exists():
+            return
+        self.export_button.config(state=tk.NORMAL, text="Bericht exportieren")
         try:
-            with open(screenshot_path, "rb") as file:
-                encoded_file = base64.b64encode(file.read()).decode("utf-8")
-            response = requests.post(url, json={"file": encoded_file, "filename": filename})
-
-            if response.status_code == 200:
-                print(f"Screenshot hochgeladen: {filename}")
-                return True
-            else:
-                print(f"Fehler beim Hochladen von {filename}: {response.status_code}")
-                return False
+            report_path = future.result()
         except Exception as e:
-            print(f"Fehler beim Hochladen von {filename}: {e}")
-            return False
+            messagebox.showerror("Fehler", f"Bericht konnte nicht exportiert werden: {e}", parent=self.root)
+            return
+        messagebox.showinfo("Bericht exportiert", f"Bericht gespeichert unter:\n{report_path}", parent=self.root)
 
-    def sync_screenshot(self, screenshot_path):
-        url = f"{self.api_base_url}/api/Vatsim/traineemanager/training/{self.training_id}/sync"
-        filename = os.path.basename(screenshot_path)
+    def restore_archive(self):
+        # Entpacken im Hintergrund; das Archiv muss dafür geschlossen sein
+        self.restore_button.config(state=tk.DISABLED, text="Wird wiederhergestellt...")
+        self.thumbnail_loader.shutdown()
+        self.training.close_archive()
+        base_folder = self.training.base_folder
 
-        try:
-            response = requests.post(url, json={"current_screenshot": filename})
+        def run():
+            try:
+                restore_training(base_folder)
+                error = None
+            except Exception as e:
+                error = e
+            self.root.after(0, self.on_archive_restored, error)
 
-            if response.status_code == 200:
-                print(f"Screenshot live geschaltet: {filename}")
-                self.comments["live"] = filename
-                if filename not in self.comments.get("besprochen", []):
-                    self.comments["besprochen"] = self.comments.get("besprochen", []) + [filename]
-                self.save_comments()
-                self.refresh()
-            else:
-                print(f"Fehler beim Live-Schalten von {filename}: {response.status_code}")
-        except Exception as e:
-            print(f"Fehler beim Live-Schalten von {filename}: {e}")
+        threading.Thread(target=run, daemon=True).start()
+
+    def on_archive_restored(self, error):
+        if not self.root.winfo_exists():
+            return
+        self.restore_button.config(state=tk.NORMAL, text="Archiv wiederherstellen")
+        if error:
+            print(f"Fehler beim Wiederherstellen des Archivs: {error}")
+            messagebox.showerror("Fehler", f"Archiv konnte nicht wiederhergestellt werden: {error}", parent=self.root)
+        self.set_training(self.training.base_folder, self.training.training_id, reload=True)
+
+    def sync_screenshot(self, screenshot_path):
+        # Nicht blockierend: schnelle Wechsel werden zusammengefasst, nur der letzte wird gesendet
+        self.start_live_sync()
+        self.live_sync.send(os.path.basename(screenshot_path))
 
     def on_close(self):
+        if self.upload_engine:
+            self.upload_engine.cancel()
+        self.thumbnail_loader.shutdown()
+        if self.transcoder:
+            self.transcoder.shutdown()
+        self.stop_live_sync()
+        self.training.close()
         if self.on_close_callback:
             self.on_close_callback()
         self.root.destroy()
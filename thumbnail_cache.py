@@ -0,0 +1,227 @@
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from instrumentation import count, instrumented, timed
+
+THUMBNAIL_SIZE = (150, 150)
+THUMBNAIL_FOLDER = ".thumbs"
+DEFAULT_MAX_ITEMS = 500
+
+
+class ThumbnailCache:
+    """
+    Zwei-stufiger Cache für Vorschaubilder.
+
+    Schlüssel ist (Pfad, mtime, Größe) der Originaldatei: Wird ein Screenshot
+    z.B. in Paint bearbeitet, ändert sich der Schlüssel und das Vorschaubild wird
+    neu erzeugt. Im Speicher gilt eine LRU-Grenze, auf der Platte liegen die
+    Vorschaubilder als kleine PNGs unter screenshots/.thumbs/.
+
+    Bei archivierten Trainings (archive) stammen mtime und Größe aus dem
+    Manifest, fehlende Vorschaubilder werden aus dem ZIP-Eintrag erzeugt.
+
+    Nicht dekodierbare Dateien merkt sich der Cache pro Schlüssel und liefert
+    für sie None, bis sich mtime oder Größe ändern.
+    """
+
+    def __init__(self, screenshot_folder, max_items=DEFAULT_MAX_ITEMS, size=THUMBNAIL_SIZE, archive=None):
+        self.thumb_folder = os.path.join(screenshot_folder, THUMBNAIL_FOLDER)
+        self.archive = archive
+        self.max_items = max_items
+        self.size = size
+        self._items = OrderedDict()
+        self._failed = set()
+        self._lock = threading.Lock()
+        # Dateiname -> Vorschaubilder auf der Platte; .thumbs wird nur einmal aufgelistet
+        self._disk_entries = None
+        self._disk_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(path):
+        stat = os.stat(path)
+        return (path, stat.st_mtime_ns, stat.st_size)
+
+    def key_for(self, path):
+        if self.archive is not None:
+            archived = self.archive.stat(os.path.basename(path))
+            if archived is not None:
+                return (path, *archived)
+        return self.make_key(path)
+
+    def get(self, path):
+        """
+        Liefert das Vorschaubild (PIL.Image) für path. Dekodiert das Original
+        nur, wenn weder Speicher- noch Platten-Cache einen Treffer haben.
+        None, wenn das Original nicht dekodiert werden kann.
+        """
+        key = self.key_for(path)
+        with self._lock:
+            if key in self._failed:
+                return None
+            image = self._items.get(key)
+            if image is not None:
+                self._items.move_to_end(key)
+                count("thumbnail.hit.memory")
+                return image
+
+        image = self._load_from_disk(key)
+        if image is None:
+            count("thumbnail.miss")
+            try:
+                image = self._create_thumbnail(path)
+            except Exception as e:
+                print(f"Fehler beim Erstellen des Vorschaubilds für {path}: {e}")
+                with self._lock:
+                    self._failed.add(key)
+                return None
+            self._save_to_disk(key, image)
+        else:
+            count("thumbnail.hit.disk")
+        self._remember(key, image)
+        return image
+
+    def peek(self, key):
+        """
+        Liefert das Vorschaubild nur, wenn es bereits im Speicher liegt (blockiert nie).
+        """
+        with self._lock:
+            image = self._items.get(key)
+            if image is not None:
+                self._items.move_to_end(key)
+            return image
+
+    def has_failed(self, key):
+        with self._lock:
+            return key in self._failed
+
+    def discard(self, path):
+        """
+        Entfernt alle Einträge zu path (z.B. nach dem Löschen des Screenshots).
+        """
+        with self._lock:
+            for key in [key for key in self._items if key[0] == path]:
+                del self._items[key]
+            self._failed = {key for key in self._failed if key[0] != path}
+        self._remove_disk_entries(os.path.basename(path))
+
+    def _remember(self, key, image):
+        with self._lock:
+            self._items[key] = image
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    @instrumented("thumbnail.decode")
+    def _create_thumbnail(self, path):
+        filename = os.path.basename(path)
+        if self.archive is not None and filename in self.archive:
+            path = self.archive.open(filename)
+        with Image.open(path) as original:
+            # Bei JPEG direkt verkleinert dekodieren, sonst per reduce() grob vorverkleinern
+            original.draft("RGB", self.size)
+            original.thumbnail(self.size, reducing_gap=2.0)
+            image = original.copy()
+        return image
+
+    def _disk_path(self, key):
+        path, mtime_ns, size = key
+        return os.path.join(self.thumb_folder, f"{os.path.basename(path)}-{mtime_ns}-{size}.png")
+
+    def _load_from_disk(self, key):
+        disk_path = self._disk_path(key)
+        if not os.path.exists(disk_path):
+            return None
+        try:
+            with timed("thumbnail.disk_load"), Image.open(disk_path) as cached:
+                cached.load()
+                return cached.copy()
+        except Exception as e:
+            print(f"Fehler beim Laden des Vorschaubilds {disk_path}: {e}")
+            return None
+
+    def _save_to_disk(self, key, image):
+        filename = os.path.basename(key[0])
+        disk_name = os.path.basename(self._disk_path(key))
+        try:
+            os.makedirs(self.thumb_folder, exist_ok=True)
+            image.save(self._disk_path(key), "PNG")
+        except Exception as e:
+            print(f"Fehler beim Speichern des Vorschaubilds für {filename}: {e}")
+            return
+        # Veraltete Vorschaubilder derselben Datei entfernen
+        with self._disk_lock:
+            names = self._known_disk_entries().setdefault(filename, set())
+            stale = names - {disk_name}
+            names.clear()
+            names.add(disk_name)
+        self._remove_files(stale)
+
+    def _remove_disk_entries(self, filename):
+        with self._disk_lock:
+            names = self._known_disk_entries().pop(filename, set())
+        self._remove_files(names)
+
+    def _known_disk_entries(self):
+        # Nur unter _disk_lock aufrufen
+        if self._disk_entries is None:
+            entries = {}
+            if os.path.isdir(self.thumb_folder):
+                with os.scandir(self.thumb_folder) as scanned:
+                    for entry in scanned:
+                        # <Dateiname>-<mtime_ns>-<Größe>.png
+                        entries.setdefault(entry.name.rsplit("-", 2)[0], set()).add(entry.name)
+            self._disk_entries = entries
+        return self._disk_entries
+
+    def _remove_files(self, names):
+        for name in names:
+            try:
+                os.remove(os.path.join(self.thumb_folder, name))
+            except OSError:
+                pass
+
+
+class ThumbnailLoader:
+    """
+    Dekodiert Vorschaubilder in einem Thread-Pool, damit der Tk-Thread nicht blockiert.
+
+    Fertige Bilder landen als (path, key, image) in der Queue results, die der
+    Tk-Thread per after() abfragt. image ist None, wenn das Laden fehlschlug.
+    """
+
+    def __init__(self, cache, max_workers=None):
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 4)
+        self.results = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    @property
+    def has_pending(self):
+        with self._lock:
+            return bool(self._pending)
+
+    def submit(self, path, key):
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self.executor.submit(self._load, path, key)
+
+    def _load(self, path, key):
+        try:
+            image = self.cache.get(path)
+        except Exception as e:
+            print(f"Error loading image {path}: {e}")
+            image = None
+        self.results.put((path, key, image))
+        with self._lock:
+            self._pending.discard(key)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
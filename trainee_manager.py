@@ -1,27 +1,31 @@
+import bisect
 import os
-import shutil
 import tkinter as tk
+import uuid
 from tkinter import filedialog, simpledialog, messagebox
-from datetime import datetime
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from screenshot_manager import ScreenshotManager
+from api_client import DEFAULT_API_BASE_URL
+from capture_router import sources_from_config
+from catalog import connect_catalog, search
+from instrumentation import metrics
+from trainee_service import DEFAULT_SCREENSHOT_FOLDER, TraineeService
+from training_archive import DEFAULT_ARCHIVE_AFTER_DAYS
+from training_store import STORE_FILE, TrainingStore
 from utils import load_config, save_config
-from docx import Document
-import time
-import uuid
 
-DEFAULT_SCREENSHOT_FOLDER = os.path.join(os.path.expanduser("~"), "Pictures", "Screenshots")
+OUTBOX_POLL_INTERVAL = 2000
 
 
 class TraineeManagerApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, config_dict=None):
         super().__init__()
         self.title("Trainee Manager")
-        self.geometry("600x400")
+        self.geometry("600x650")
 
-        self.config_dict = load_config()
+        # main.py liest die Konfiguration bereits parallel zum Import von Tk
+        self.config_dict = config_dict if config_dict is not None else load_config()
         self.trainee_folder = self.config_dict.get("trainee_folder", "")
+        if self.config_dict.get("instrumentation"):
+            metrics.enable()
         if not self.trainee_folder or not os.path.isdir(self.trainee_folder):
             self.trainee_folder = filedialog.askdirectory(title="Bitte den Trainee-Hauptordner auswählen")
             if not self.trainee_folder:
@@ -31,23 +35,43 @@ class TraineeManagerApp(tk.Tk):
             self.config_dict["trainee_folder"] = self.trainee_folder
             save_config(self.config_dict)
 
-        self.training_mode_active = False
-        self.current_training_folder = None
         self.screenshot_manager = None
-        self.current_training_id = None
-        self.screenshot_folder = DEFAULT_SCREENSHOT_FOLDER
-        os.makedirs(self.screenshot_folder, exist_ok=True)
+        self.performance_panel = None
+        os.makedirs(DEFAULT_SCREENSHOT_FOLDER, exist_ok=True)
+        # Ereignisse aus Hintergrund-Threads kommen per after() im Tk-Thread an
+        self.service = TraineeService(
+            self.trainee_folder, DEFAULT_SCREENSHOT_FOLDER, listener=self,
+            call_soon=lambda func, *args: self.after(0, func, *args),
+            capture_sources=sources_from_config(self.config_dict.get("capture_sources"), DEFAULT_SCREENSHOT_FOLDER),
+        )
+
+        # python-docx, PIL und requests werden erst bei der ersten Verwendung geladen
+        self.document_generator = None
+        self.report_exporter = None
+        self.archive_executor = None
+
+        self.trainees = []  # Sortierte, im Speicher gehaltene Trainee-Ordner
+        self.visible_trainees = []  # Aktuell in der Listbox angezeigte (gefilterte) Trainees
 
         self.create_widgets()
-        self.update_trainee_list()
+        self.load_trainees()
+        # Leistungs-Fenster aus jedem Fenster der App erreichbar
+        self.bind_all("<F12>", lambda e: self.open_performance_panel())
 
-        self.observer = None
-        self.start_observer()
+        # Observer, Katalog und Outbox erst starten, wenn das erste Fenster gezeichnet ist
+        self.after_idle(self.after, 0, self.service.start)
+        self.after(OUTBOX_POLL_INTERVAL, self.poll_outbox_status)
 
     def create_widgets(self):
         lbl = tk.Label(self, text="Trainees:")
         lbl.pack(pady=(10, 0))
 
+        # Filter schränkt nur die Liste im Speicher ein, ohne Dateisystemzugriff
+        self.trainee_filter_var = tk.StringVar()
+        self.trainee_filter_var.trace_add("write", lambda *_: self.update_trainee_list())
+        trainee_filter_entry = tk.Entry(self, textvariable=self.trainee_filter_var, width=50)
+        trainee_filter_entry.pack(pady=(5, 0))
+
         self.trainee_listbox = tk.Listbox(self, height=10, width=50)
         self.trainee_listbox.pack(pady=5)
 
@@ -65,6 +89,26 @@ class TraineeManagerApp(tk.Tk):
         )
         self.stop_training_button.pack(pady=5)
 
+        btn_search = tk.Button(self, text="Suchen", command=self.open_search_window)
+        btn_search.pack(pady=5)
+
+        btn_documents = tk.Button(self, text="Trainingsdokumente erzeugen", command=self.generate_trainee_docs)
+        btn_documents.pack(pady=5)
+
+        btn_reports = tk.Button(self, text="Debrief-Berichte exportieren", command=self.export_trainee_reports)
+        btn_reports.pack(pady=5)
+
+        btn_open_training = tk.Button(self, text="Training ansehen", command=self.open_training)
+        btn_open_training.pack(pady=5)
+
+        btn_archive = tk.Button(self, text="Alte Trainings archivieren", command=self.archive_trainee_trainings)
+        btn_archive.pack(pady=5)
+
+        # Sammelanzeige für ausstehende Übertragungen statt einzelner Fehlerdialoge
+        self.outbox_status_label = tk.Label(self, text="", font=("Arial", 9))
+        self.outbox_status_label.pack(pady=(0, 5))
+        self.outbox_status_label.bind("<Button-1>", lambda event: self.discard_dead_outbox_entries())
+
     # Trainingsmodus und Screenshots
     def start_training_mode(self):
         selected_trainee = self.trainee_listbox.get(tk.ACTIVE)
@@ -76,114 +120,193 @@ class TraineeManagerApp(tk.Tk):
         if not training_name:
             return
 
-        self.current_training_id = str(uuid.uuid4())
-
-        self.current_training_folder = os.path.join(self.trainee_folder, selected_trainee, training_name)
-        os.makedirs(self.current_training_folder, exist_ok=True)
+        # Bei mehreren Aufnahmeprofilen (z.B. ein Hotkey-Profil pro Ausbilder) nachfragen
+        profiles = self.service.router.profiles
+        profile = profiles[0]
+        if len(profiles) > 1:
+            profile = simpledialog.askstring(
+                "Aufnahmeprofil", f"Profil für dieses Training ({', '.join(profiles)}):", initialvalue=profile
+            )
+            if profile not in profiles:
+                return
 
-        self.training_mode_active = True
-        self.training_mode_label.config(text="Trainingsmodus aktiv", fg="green")
-        self.stop_training_button.config(state=tk.NORMAL)
-        #self.create_and_open_training_doc(selected_trainee, training_name)
+        self.service.start_training(selected_trainee, training_name, profile)
+        self.update_training_mode_label()
+        self.create_and_open_training_doc(selected_trainee, training_name)
         self.manage_screenshot_manager()
-        self.start_timer()
 
     def stop_training_mode(self):
-        self.training_mode_active = False
-        self.current_training_folder = None
-        self.training_mode_label.config(text="Trainingsmodus nicht aktiv", fg="red")
-        self.stop_training_button.config(state=tk.DISABLED)
-        self.stop_timer()
+        # Beendet das zuletzt gestartete Training, weitere laufende bleiben aktiv
+        duration = self.service.stop_training()
+        self.update_training_mode_label()
+        if duration is not None:
+            hours, remainder = divmod(duration, 3600)
+            minutes, seconds = divmod(remainder, 60)
+            duration_str = f"{int(hours)}h {int(minutes)}m {int(seconds)}s"
+            messagebox.showinfo("Trainingsdauer", f"Das Training dauerte: {duration_str}")
+        if self.service.training_mode_active:
+            self.manage_screenshot_manager()
+
+    def update_training_mode_label(self):
+        active = len(self.service.router.active())
+        if not active:
+            self.training_mode_label.config(text="Trainingsmodus nicht aktiv", fg="red")
+            self.stop_training_button.config(state=tk.DISABLED)
+            return
+        text = "Trainingsmodus aktiv" if active == 1 else f"Trainingsmodus aktiv ({active} Trainings)"
+        self.training_mode_label.config(text=text, fg="green")
+        self.stop_training_button.config(state=tk.NORMAL)
+
+    def get_document_generator(self):
+        if self.document_generator is None:
+            from training_documents import TrainingDocumentGenerator
+            self.document_generator = TrainingDocumentGenerator()
+        return self.document_generator
+
+    def get_report_exporter(self):
+        if self.report_exporter is None:
+            from report_export import ReportExporter
+            self.report_exporter = ReportExporter(max_workers=self.config_dict.get("export_workers"))
+        return self.report_exporter
 
     def create_and_open_training_doc(self, trainee_folder_name, training_name):
-        template_path = os.path.join("templates", "training_template.docx")
+        template_path = self.get_document_generator().template_path
         if not os.path.exists(template_path):
             messagebox.showerror("Fehler", f"Template '{template_path}' nicht gefunden.")
             return
 
-        doc = Document(template_path)
-        for para in doc.paragraphs:
-            if "{Name}" in para.text:
-                para.text = para.text.replace("{Name}", trainee_folder_name)
-            if "{Training}" in para.text:
-                para.text = para.text.replace("{Training}", training_name)
-            if "{Date}" in para.text:
-                para.text = para.text.replace("{Date}", datetime.now().strftime("%Y-%m-%d"))
+        # Erzeugung im Hintergrund, Öffnen erst im Tk-Thread
+        future = self.document_generator.generate(
+            self.service.current_training_folder, trainee_folder_name, training_name
+        )
+        future.add_done_callback(lambda f: self.after(0, self.on_training_doc_created, f))
 
-        doc_filename = f"{training_name}_training_notes.docx"
-        doc_path = os.path.join(self.current_training_folder, doc_filename)
-        doc.save(doc_path)
+    def on_training_doc_created(self, future):
+        try:
+            doc_path = future.result()
+        except Exception as e:
+            print(f"Fehler beim Erzeugen des Trainingsdokuments: {e}")
+            return
         os.startfile(doc_path)  # Öffnet in Word (Windows)
 
-    def on_new_screenshot_detected(self, file_path):
-        if not self.training_mode_active or not self.current_training_folder:
+    def generate_trainee_docs(self):
+        selected_trainee = self.trainee_listbox.get(tk.ACTIVE)
+        if not selected_trainee:
+            messagebox.showerror("Fehler", "Bitte wähle zuerst einen Trainee aus.")
+            return
+        template_path = self.get_document_generator().template_path
+        if not os.path.exists(template_path):
+            messagebox.showerror("Fehler", f"Template '{template_path}' nicht gefunden.")
             return
 
-        print(file_path)
-        self.move_screenshot_to_training_folder(file_path)
-        self.after(0, self.manage_screenshot_manager)
+        future = self.document_generator.generate_for_trainee(os.path.join(self.trainee_folder, selected_trainee))
+        future.add_done_callback(lambda f: self.after(0, self.on_trainee_docs_created, selected_trainee, f))
 
-    def move_screenshot_to_training_folder(self, file_path):
-        screenshots_subfolder = os.path.join(self.current_training_folder, "screenshots")
-        os.makedirs(screenshots_subfolder, exist_ok=True)
+    def on_trainee_docs_created(self, trainee, future):
+        try:
+            written = future.result()
+        except Exception as e:
+            messagebox.showerror("Fehler", f"Dokumente für {trainee} konnten nicht erzeugt werden: {e}")
+            return
+        messagebox.showinfo("Trainingsdokumente", f"{len(written)} Dokument(e) für {trainee} erzeugt.")
+
+    def export_trainee_reports(self):
+        selected_trainee = self.trainee_listbox.get(tk.ACTIVE)
+        if not selected_trainee:
+            messagebox.showerror("Fehler", "Bitte wähle zuerst einen Trainee aus.")
+            return
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        new_filename = f"screenshot_{timestamp}.png"
-        destination_path = os.path.join(screenshots_subfolder, new_filename)
+        # Alle Trainings parallel im Hintergrund exportieren
+        future = self.get_report_exporter().export_trainee(os.path.join(self.trainee_folder, selected_trainee))
+        future.add_done_callback(lambda f: self.after(0, self.on_trainee_reports_exported, selected_trainee, f))
 
-        time.sleep(0.5)
-        
+    def on_trainee_reports_exported(self, trainee, future):
         try:
-            shutil.move(file_path, destination_path)
+            written, failed = future.result()
         except Exception as e:
-            print(f"Fehler beim Verschieben des Screenshots: {e}")
+            messagebox.showerror("Fehler", f"Berichte für {trainee} konnten nicht exportiert werden: {e}")
+            return
+        text = f"{len(written)} Bericht(e) für {trainee} exportiert."
+        if failed:
+            text += "\nFehlgeschlagen: " + ", ".join(os.path.basename(path) for path in failed)
+        messagebox.showinfo("Debrief-Berichte", text)
+
+    def on_screenshots_ingested(self, paths):
+        # Ein UI-Update pro Schwung neuer Screenshots; der Index übernimmt nur die neuen Dateien
+        if not self.service.training_mode_active or not self.service.current_training_folder:
+            return
+        manager = self.screenshot_manager
+        if manager and manager.training.base_folder == self.service.current_training_folder:
+            manager.add_screenshots(paths)
+        else:
+            self.manage_screenshot_manager()
+
+    def on_screenshot_deleted(self, path):
+        if self.screenshot_manager:
+            self.screenshot_manager.forget_screenshot(path)
 
     def manage_screenshot_manager(self):
+        self.show_training(self.service.current_training_folder, self.service.current_training_id)
+
+    def show_training(self, base_folder, training_id):
         if not self.screenshot_manager:
+            from screenshot_manager import ScreenshotManager
+
             manager_window = tk.Toplevel(self)
             self.screenshot_manager = ScreenshotManager(
                 root=manager_window,
-                base_folder=self.current_training_folder,
-                training_id=self.current_training_id,  
-                api_base_url="http://localhost:3000",
-                on_close_callback=self.on_manager_close
+                base_folder=base_folder,
+                training_id=training_id,
+                api_base_url=self.config_dict.get("api_base_url", DEFAULT_API_BASE_URL),
+                on_close_callback=self.on_manager_close,
+                upload_mode=self.config_dict.get("upload_mode", "stream"),
+                thumbnail_workers=self.config_dict.get("thumbnail_workers"),
+                transcode_settings=self.config_dict.get("upload_transcode"),
+                outbox=self.service.outbox,
+                report_exporter_factory=self.get_report_exporter,
             )
         else:
-            self.screenshot_manager.refresh()
+            self.screenshot_manager.set_training(base_folder, training_id)
 
     def on_manager_close(self):
         self.screenshot_manager = None
 
     # ------------------------------
-    # Timer
+    # Trainees
     # ------------------------------
-    def start_timer(self):
-        self.training_start_time = time.time()
-        print("Stoppuhr gestartet.")
-
-    def stop_timer(self):
-        if not hasattr(self, "training_start_time"):
-            print("Die Stoppuhr wurde nicht gestartet.")
-            return
+    def load_trainees(self):
+        # Einmaliges Einlesen, danach nur noch Änderungen vom Watcher
+        self.trainees = self.service.list_trainees()
+        self.update_trainee_list()
 
-        duration = time.time() - self.training_start_time
-        hours, remainder = divmod(duration, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        duration_str = f"{int(hours)}h {int(minutes)}m {int(seconds)}s"
+    def trainee_matches_filter(self, folder_name):
+        return self.trainee_filter_var.get().lower() in folder_name.lower()
 
-        messagebox.showinfo("Trainingsdauer", f"Das Training dauerte: {duration_str}")
-        del self.training_start_time
-    # ------------------------------
-    # Trainees
-    # ------------------------------
     def update_trainee_list(self):
+        self.visible_trainees = [name for name in self.trainees if self.trainee_matches_filter(name)]
         self.trainee_listbox.delete(0, tk.END)
-        if os.path.isdir(self.trainee_folder):
-            for folder_name in os.listdir(self.trainee_folder):
-                full_path = os.path.join(self.trainee_folder, folder_name)
-                if os.path.isdir(full_path):
-                    self.trainee_listbox.insert(tk.END, folder_name)
-    
+        self.trainee_listbox.insert(tk.END, *self.visible_trainees)
+
+    def on_trainee_added(self, folder_name):
+        if folder_name in self.trainees:
+            return
+        keys = [name.lower() for name in self.trainees]
+        self.trainees.insert(bisect.bisect(keys, folder_name.lower()), folder_name)
+        if self.trainee_matches_filter(folder_name):
+            keys = [name.lower() for name in self.visible_trainees]
+            idx = bisect.bisect(keys, folder_name.lower())
+            self.visible_trainees.insert(idx, folder_name)
+            self.trainee_listbox.insert(idx, folder_name)
+
+    def on_trainee_removed(self, folder_name):
+        if folder_name not in self.trainees:
+            return
+        self.trainees.remove(folder_name)
+        if folder_name in self.visible_trainees:
+            idx = self.visible_trainees.index(folder_name)
+            del self.visible_trainees[idx]
+            self.trainee_listbox.delete(idx)
+
     def add_trainee(self):
         trainee_name = simpledialog.askstring("Trainee-Name", "Name des Trainees:")
         if not trainee_name:
@@ -194,45 +317,175 @@ class TraineeManagerApp(tk.Tk):
             return
 
         folder_name = f"{trainee_name}-{trainee_id}"
-        path = os.path.join(self.trainee_folder, folder_name)
-        if os.path.exists(path):
+        try:
+            self.service.add_trainee(trainee_name, trainee_id)
+            messagebox.showinfo("Erfolg", f"Trainee {folder_name} wurde angelegt.")
+        except FileExistsError:
             messagebox.showerror("Fehler", f"Trainee-Ordner '{folder_name}' existiert bereits.")
             return
+        except Exception as e:
+            messagebox.showerror("Fehler", f"Fehler beim Anlegen des Ordners:\n{e}")
+            return
+
+        self.on_trainee_added(folder_name)
 
+    def open_training(self):
+        # Auch archivierte Trainings, die Bilder werden dann bei Bedarf aus dem ZIP gelesen
+        selected_trainee = self.trainee_listbox.get(tk.ACTIVE)
+        initial_folder = os.path.join(self.trainee_folder, selected_trainee) if selected_trainee else self.trainee_folder
+        training_folder = filedialog.askdirectory(title="Training auswählen", initialdir=initial_folder)
+        if not training_folder:
+            return
+        if not os.path.exists(os.path.join(training_folder, STORE_FILE)) and not os.path.isdir(
+            os.path.join(training_folder, "screenshots")
+        ):
+            messagebox.showerror("Fehler", "Der gewählte Ordner ist kein Trainingsordner.")
+            return
+        store = TrainingStore(training_folder)
         try:
-            os.makedirs(path)
-            messagebox.showinfo("Erfolg", f"Trainee {folder_name} wurde angelegt.")
+            training_id = store.get_meta("training_id")
+            if not training_id:
+                # Ältere Trainings haben keine gespeicherte ID; wie bei start_training eine neue vergeben
+                training_id = str(uuid.uuid4())
+                store.set_meta("training_id", training_id)
+        finally:
+            store.close()
+        self.show_training(training_folder, training_id)
+
+    # ------------------------------
+    # Archiv
+    # ------------------------------
+    def archive_trainee_trainings(self):
+        selected_trainee = self.trainee_listbox.get(tk.ACTIVE)
+        if not selected_trainee:
+            messagebox.showerror("Fehler", "Bitte wähle zuerst einen Trainee aus.")
+            return
+        older_than = self.config_dict.get("archive_after_days", DEFAULT_ARCHIVE_AFTER_DAYS)
+        if not messagebox.askyesno(
+            "Trainings archivieren",
+            f"Trainings von {selected_trainee}, deren letzter Screenshot älter als {older_than} Tage ist, "
+            "in screenshots.zip archivieren?\nVorschaubilder und Bemerkungen bleiben sofort verfügbar.",
+        ):
+            return
+
+        # Das gerade geöffnete Training bleibt unberührt, laufende schließt der Service selbst aus
+        exclude = [self.screenshot_manager.training.base_folder] if self.screenshot_manager else []
+        if self.archive_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.archive_executor = ThreadPoolExecutor(max_workers=1)
+        future = self.archive_executor.submit(
+            self.service.archive_old_trainings, older_than, selected_trainee, exclude
+        )
+        future.add_done_callback(lambda f: self.after(0, self.on_trainings_archived, selected_trainee, f))
+
+    def on_trainings_archived(self, trainee, future):
+        try:
+            results = future.result()
         except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler beim Anlegen des Ordners:\n{e}")
+            messagebox.showerror("Fehler", f"Trainings von {trainee} konnten nicht archiviert werden: {e}")
             return
+        freed = sum(freed for _, _, freed in results)
+        messagebox.showinfo(
+            "Archiv", f"{len(results)} Training(s) von {trainee} archiviert, {freed / 1_000_000:.1f} MB frei."
+        )
 
-        self.update_trainee_list()
+    # ------------------------------
+    # Suche
+    # ------------------------------
+    def open_search_window(self):
+        search_window = tk.Toplevel(self)
+        search_window.title("Suche in allen Trainings")
+
+        query_var = tk.StringVar()
+        query_entry = tk.Entry(search_window, textvariable=query_var, width=60)
+        query_entry.pack(padx=10, pady=(10, 5))
+        query_entry.focus_set()
+
+        results_listbox = tk.Listbox(search_window, height=15, width=90)
+        results_listbox.pack(padx=10, pady=(0, 5), fill="both", expand=True)
+
+        def rebuild_catalog():
+            self.service.catalog_indexer.request_full_reindex()
+            rebuild_button.config(text="Katalog wird neu aufgebaut...", state="disabled")
+
+        rebuild_button = tk.Button(search_window, text="Katalog neu aufbauen", command=rebuild_catalog)
+        rebuild_button.pack(pady=(0, 10))
+
+        # Eigene Verbindung für den Tk-Thread, geschrieben wird nur im Indexer-Thread
+        conn = connect_catalog(self.service.catalog_indexer.catalog_path)
+        results = []
+
+        def run_search(*_):
+            results_listbox.delete(0, tk.END)
+            results[:] = search(conn, query_var.get())
+            for trainee, training, filename, text in results:
+                location = " / ".join(part for part in (trainee, training, filename) if part)
+                results_listbox.insert(tk.END, f"{location}: {text}" if filename else location)
+
+        def open_result(event):
+            selection = results_listbox.curselection()
+            if not selection:
+                return
+            trainee, training, _, _ = results[selection[0]]
+            os.startfile(os.path.join(self.trainee_folder, trainee, training))
+
+        def on_search_close():
+            conn.close()
+            search_window.destroy()
+
+        query_var.trace_add("write", run_search)
+        results_listbox.bind("<Double-1>", open_result)
+        search_window.protocol("WM_DELETE_WINDOW", on_search_close)
 
-    # Observer
-    def start_observer(self):
-        if not os.path.isdir(self.screenshot_folder):
+    def open_performance_panel(self):
+        if self.performance_panel:
+            self.performance_panel.window.lift()
             return
-        event_handler = ScreenshotFolderHandler(self)
-        self.observer = Observer()
-        self.observer.schedule(event_handler, self.screenshot_folder, recursive=False)
-        self.observer.start()
+        from performance_panel import PerformancePanel
+
+        self.performance_panel = PerformancePanel(self, on_close_callback=self.on_performance_panel_close)
+
+    def on_performance_panel_close(self):
+        self.performance_panel = None
+
+    def poll_outbox_status(self):
+        pending, failed, dead, last_error = self.service.outbox.status()
+        if dead:
+            self.outbox_status_label.config(
+                text=f"Aufgegebene Übertragungen: {dead} (letzter Fehler: {last_error}) - Klicken zum Verwerfen",
+                fg="red",
+            )
+        elif not pending:
+            self.outbox_status_label.config(text="", fg="black")
+        elif failed:
+            self.outbox_status_label.config(
+                text=f"Ausstehende Übertragungen: {pending} (letzter Fehler: {last_error})", fg="red"
+            )
+        else:
+            self.outbox_status_label.config(text=f"Ausstehende Übertragungen: {pending}", fg="black")
+        self.after(OUTBOX_POLL_INTERVAL, self.poll_outbox_status)
+
+    def discard_dead_outbox_entries(self):
+        if not self.service.outbox.status()[2]:
+            return
+        if messagebox.askyesno(
+            "Übertragungen verwerfen",
+            "Aufgegebene Übertragungen endgültig verwerfen?\n"
+            "Noch vorhandene Screenshots werden beim nächsten Debrief erneut hochgeladen.",
+        ):
+            self.service.outbox.discard_dead()
 
     def on_closing(self):
-        if self.observer:
-            self.observer.stop()
-            self.observer.join()
+        # Uploads und Live-Sync zuerst beenden, service.stop() schließt die gemeinsame Outbox
+        if self.screenshot_manager:
+            self.screenshot_manager.on_close()
+        self.service.stop()
+        if self.document_generator:
+            self.document_generator.shutdown()
+        if self.report_exporter:
+            self.report_exporter.shutdown()
+        if self.archive_executor:
+            self.archive_executor.shutdown(wait=False, cancel_futures=True)
         self.config_dict["trainee_folder"] = self.trainee_folder
         save_config(self.config_dict)
         self.destroy()
-
-
-class ScreenshotFolderHandler(FileSystemEventHandler):
-    def __init__(self, app):
-        super().__init__()
-        self.app = app
-
-    def on_created(self, event):
-        if not event.is_directory:
-            _, ext = os.path.splitext(event.src_path)
-            if ext.lower() == ".png":
-                self.app.on_new_screenshot_detected(event.src_path)
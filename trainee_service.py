@@ -0,0 +1,299 @@
+import os
+import time
+import uuid
+from datetime import datetime
+
+from capture_router import DEFAULT_PROFILE, ActiveTraining, CaptureRouter, CaptureSource
+from catalog import CATALOG_FILE, CatalogIndexer
+from instrumentation import instrumented
+from outbox import OUTBOX_FILE, Outbox, OutboxDispatcher
+from screenshot_ingestion import (
+    ScreenshotIngestor, atomic_move, claim_screenshot_filename, is_screenshot_file, record_capture,
+)
+from training_archive import DEFAULT_ARCHIVE_AFTER_DAYS, archive_training, find_archivable_trainings
+from training_store import TrainingStore
+
+DEFAULT_SCREENSHOT_FOLDER = os.path.join(os.path.expanduser("~"), "Pictures", "Screenshots")
+
+
+class TraineeService:
+    """
+    GUI-freier Kern des Trainee Managers: Trainee-Ordner, Trainingsmodus,
+    Übernahme neuer Screenshots, Katalog und Outbox.
+
+    Neue Aufnahmen kommen aus einer oder mehreren Quellen (capture_sources,
+    sonst nur screenshot_folder mit PNG). Der CaptureRouter verteilt sie auf
+    die laufenden Trainings, eines pro Aufnahmeprofil. Alle Quellen laufen über
+    einen gemeinsamen Observer und den Ingestor-Thread.
+
+    Ereignisse aus Hintergrund-Threads (on_screenshots_ingested,
+    on_screenshot_deleted, on_trainee_added, on_trainee_removed) gehen an den
+    optionalen listener.
+    call_soon legt fest, in welchem Thread sie ankommen; die Tk-Oberfläche
+    übergibt dafür after(0, ...), ohne listener laufen sie direkt.
+    """
+
+    def __init__(self, trainee_folder, screenshot_folder=DEFAULT_SCREENSHOT_FOLDER, listener=None,
+                 call_soon=None, catalog_path=CATALOG_FILE, outbox_path=OUTBOX_FILE, capture_sources=None):
+        self.trainee_folder = trainee_folder
+        self.screenshot_folder = screenshot_folder
+        self.listener = listener
+        self.call_soon = call_soon or (lambda func, *args: func(*args))
+
+        self.router = CaptureRouter(capture_sources or [CaptureSource(screenshot_folder)])
+
+        self.observer = None
+        self.ingestor = ScreenshotIngestor(self)
+        self.catalog_indexer = CatalogIndexer(trainee_folder, catalog_path)
+        # Fehlgeschlagene Uploads/Live-Syncs werden dauerhaft gespeichert und im Hintergrund wiederholt
+        self.outbox = Outbox(outbox_path)
+        self.outbox_dispatcher = OutboxDispatcher(self.outbox)
+
+    def start(self, watch_screenshots=True):
+        self.ingestor.start()
+        self.catalog_indexer.start()
+        self.outbox_dispatcher.start()
+        self.start_observer(watch_screenshots)
+
+    def stop(self):
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+        self.ingestor.stop()
+        self.catalog_indexer.stop()
+        self.outbox_dispatcher.stop()
+        self.outbox.close()
+
+    def notify(self, event, *args):
+        handler = getattr(self.listener, event, None)
+        if handler:
+            self.call_soon(handler, *args)
+
+    # Trainees
+    def list_trainees(self):
+        # scandir liefert den Eintragstyp ohne zusätzlichen stat-Aufruf
+        if not os.path.isdir(self.trainee_folder):
+            return []
+        with os.scandir(self.trainee_folder) as entries:
+            return sorted((entry.name for entry in entries if entry.is_dir()), key=str.lower)
+
+    def add_trainee(self, trainee_name, trainee_id):
+        """
+        Legt den Ordner <Name>-<ID> an. FileExistsError, wenn es ihn schon gibt.
+        """
+        folder_name = f"{trainee_name}-{trainee_id}"
+        os.makedirs(os.path.join(self.trainee_folder, folder_name))
+        return folder_name
+
+    # Trainingsmodus
+    @property
+    def training_mode_active(self):
+        return self.router.current is not None
+
+    @property
+    def current_training_folder(self):
+        training = self.router.current
+        return training.folder if training else None
+
+    @property
+    def current_training_id(self):
+        training = self.router.current
+        return training.training_id if training else None
+
+    def start_training(self, trainee, training_name, profile=DEFAULT_PROFILE):
+        """
+        Startet ein Training für das Aufnahmeprofil; ein dort laufendes Training wird beendet.
+        """
+        training_folder = os.path.join(self.trainee_folder, trainee, training_name)
+        training = ActiveTraining(training_folder, str(uuid.uuid4()), profile)
+        os.makedirs(training_folder, exist_ok=True)
+        # Training-ID merken, damit ein späterer Upload (z.B. per Kommandozeile) sie wiederfindet
+        store = TrainingStore(training_folder)
+        try:
+            store.set_meta("training_id", training.training_id)
+        finally:
+            store.close()
+        previous = self.router.activate(training)
+        if previous:
+            self.record_training_duration(previous.folder, time.time() - previous.start_time)
+        print("Stoppuhr gestartet.")
+        return training_folder
+
+    def stop_training(self, profile=None):
+        """
+        Beendet das Training des Profils (ohne Angabe das zuletzt gestartete) und
+        speichert die Dauer. Gibt die Dauer (s) zurück.
+        """
+        if profile is None:
+            profile = self.router.current.profile if self.router.current else DEFAULT_PROFILE
+        training = self.router.deactivate(profile)
+        if training is None:
+            print("Die Stoppuhr wurde nicht gestartet.")
+            return None
+
+        duration = time.time() - training.start_time
+        self.record_training_duration(training.folder, duration)
+        return duration
+
+    def stop_all_trainings(self):
+        """
+        Beendet alle laufenden Trainings. Gibt {Profil: Dauer (s)} zurück.
+        """
+        return {training.profile: self.stop_training(training.profile) for training in self.router.active()}
+
+    def record_training_duration(self, training_folder, duration):
+        # Dauer im Trainings-Index ablegen, damit sie im Katalog erscheint
+        try:
+            store = TrainingStore(training_folder)
+            try:
+                store.add_duration(duration)
+            finally:
+                store.close()
+        except Exception as e:
+            print(f"Fehler beim Speichern der Trainingsdauer: {e}")
+
+    # Archiv
+    def archive_old_trainings(self, older_than_days=DEFAULT_ARCHIVE_AFTER_DAYS, trainee=None, exclude=(),
+                              dry_run=False):
+        """
+        Archiviert abgeschlossene Trainings, deren neuester Screenshot älter als
+        older_than_days ist. Laufende Trainings und exclude bleiben unberührt.
+        Gibt [(Trainingsordner, Anzahl Bilder, freigegebene Bytes)] zurück.
+        """
+        exclude = list(exclude) + [training.folder for training in self.router.active()]
+        results = []
+        for training_folder in find_archivable_trainings(self.trainee_folder, older_than_days, trainee, exclude):
+            if dry_run:
+                results.append((training_folder, 0, 0))
+                continue
+            try:
+                count, freed = archive_training(training_folder)
+                results.append((training_folder, count, freed))
+            except Exception as e:
+                print(f"Fehler beim Archivieren von {training_folder}: {e}")
+        return results
+
+    # Screenshots
+    def on_new_screenshot_detected(self, file_path):
+        training = self.router.route(file_path)
+        if training is None:
+            return
+
+        print(file_path)
+        # Verschieben übernimmt der Ingestor-Thread, sobald die Datei fertig geschrieben ist
+        self.ingestor.submit(file_path, training.folder)
+
+    def on_screenshot_closed(self, file_path):
+        self.ingestor.mark_closed(file_path)
+
+    def on_screenshots_ingested(self, paths):
+        self.notify("on_screenshots_ingested", paths)
+
+    @instrumented("ingest.move")
+    def move_screenshot_to_training_folder(self, file_path, training_folder=None, captured_at=None):
+        training_folder = training_folder or self.current_training_folder
+        screenshots_subfolder = os.path.join(training_folder, "screenshots")
+        os.makedirs(screenshots_subfolder, exist_ok=True)
+
+        captured_at = captured_at or datetime.now()
+        # Endung bleibt erhalten (PNG, JPG oder WebP je nach Aufnahme-Werkzeug)
+        extension = os.path.splitext(file_path)[1].lower()
+        destination_path = None
+        try:
+            new_filename = claim_screenshot_filename(screenshots_subfolder, captured_at, extension)
+            destination_path = os.path.join(screenshots_subfolder, new_filename)
+            # Ersetzt nur den eigenen Platzhalter
+            atomic_move(file_path, destination_path)
+            record_capture(training_folder, new_filename, captured_at)
+            return destination_path
+        except Exception as e:
+            print(f"Fehler beim Verschieben des Screenshots: {e}")
+            # Platzhalter nicht liegen lassen, solange das Original noch im Quellordner liegt
+            if destination_path and os.path.exists(file_path):
+                try:
+                    os.remove(destination_path)
+                except OSError:
+                    pass
+            return None
+
+    # Observer
+    def start_observer(self, watch_screenshots=True):
+        # watchdog lädt die Plattform-Backends, daher erst hier statt beim Programmstart
+        from watchdog.observers import Observer
+
+        self.observer = Observer()
+        if watch_screenshots:
+            for source in self.router.sources:
+                if os.path.isdir(source.folder):
+                    self.observer.schedule(CaptureSourceHandler(self, source), source.folder, recursive=source.recursive)
+                else:
+                    print(f"Aufnahme-Ordner nicht gefunden, wird nicht beobachtet: {source.folder}")
+        # Trainee-Ordner rekursiv beobachten, um den Katalog inkrementell aktuell zu halten
+        if os.path.isdir(self.trainee_folder):
+            self.observer.schedule(TraineeFolderHandler(self), self.trainee_folder, recursive=True)
+        self.observer.start()
+
+
+# Der Observer ruft nur dispatch(event) auf; ohne FileSystemEventHandler als
+# Basisklasse muss watchdog beim Import dieses Moduls nicht geladen werden.
+class CaptureSourceHandler:
+    def __init__(self, service, source):
+        self.service = service
+        self.source = source
+
+    def dispatch(self, event):
+        if event.event_type == "created":
+            self.on_created(event)
+        elif event.event_type == "moved":
+            self.on_moved(event)
+        elif event.event_type == "closed":
+            self.on_closed(event)
+
+    def on_created(self, event):
+        if not event.is_directory and self.source.accepts(event.src_path):
+            self.service.on_new_screenshot_detected(event.src_path)
+
+    def on_moved(self, event):
+        # Manche Werkzeuge schreiben in eine temporäre Datei und benennen sie danach um
+        if not event.is_directory and self.source.accepts(event.dest_path):
+            self.service.on_new_screenshot_detected(event.dest_path)
+
+    def on_closed(self, event):
+        # Nur unter inotify verfügbar, sonst entscheidet die Größenprüfung
+        if not event.is_directory:
+            self.service.on_screenshot_closed(event.src_path)
+
+
+class TraineeFolderHandler:
+    def __init__(self, service):
+        self.service = service
+
+    def dispatch(self, event):
+        self.on_any_event(event)
+
+    def on_any_event(self, event):
+        if event.event_type in ("opened", "closed", "closed_no_write"):
+            return
+        self.service.catalog_indexer.mark_dirty(event.src_path)
+        if getattr(event, "dest_path", ""):
+            self.service.catalog_indexer.mark_dirty(event.dest_path)
+
+        # Direkte Unterordner = Trainees: nur die Änderung an die Liste weitergeben.
+        # Bei "deleted" ist is_directory unter Windows nicht verlässlich, unbekannte Namen ignoriert die App.
+        if event.event_type in ("deleted", "moved") and self.is_trainee_path(event.src_path):
+            self.service.notify("on_trainee_removed", os.path.basename(event.src_path))
+        if event.is_directory and event.event_type == "created" and self.is_trainee_path(event.src_path):
+            self.service.notify("on_trainee_added", os.path.basename(event.src_path))
+        if event.is_directory and event.event_type == "moved" and self.is_trainee_path(event.dest_path):
+            self.service.notify("on_trainee_added", os.path.basename(event.dest_path))
+
+        # Außerhalb der App gelöschte Screenshots aus den Indizes offener Trainings nehmen
+        if event.event_type in ("deleted", "moved") and self.is_screenshot_path(event.src_path):
+            self.service.notify("on_screenshot_deleted", event.src_path)
+
+    @staticmethod
+    def is_screenshot_path(path):
+        return is_screenshot_file(path) and os.path.basename(os.path.dirname(path)) == "screenshots"
+
+    def is_trainee_path(self, path):
+        return os.path.normpath(os.path.dirname(path)) == os.path.normpath(self.service.trainee_folder)
@@ -0,0 +1,255 @@
+"""
+Archivierung abgeschlossener Trainings.
+
+Die Screenshots eines Trainings wandern zusammen mit den Bemerkungen und
+einem Manifest in screenshots.zip im Trainingsordner. Im Ordner bleiben der
+Index (training.db) und die Vorschaubilder (screenshots/.thumbs), sodass
+Katalog, Suche und Galerie ohne Entpacken funktionieren. Einzelne Bilder
+werden bei Bedarf direkt aus dem ZIP gelesen.
+"""
+import io
+import json
+import os
+import shutil
+import threading
+import time
+import zipfile
+from datetime import datetime
+
+from screenshot_ingestion import is_screenshot_file, screenshot_timestamp
+from training_store import TrainingStore
+
+ARCHIVE_FILE = "screenshots.zip"
+MANIFEST_NAME = "manifest.json"
+COMMENTS_NAME = "comments.json"
+MEMBER_FOLDER = "screenshots/"
+ARCHIVE_VERSION = 1
+DEFAULT_ARCHIVE_AFTER_DAYS = 30
+# Einzeln entpackte Bilder (z.B. zum Öffnen in Paint), im screenshots-Ordner
+EXTRACT_FOLDER = ".archive_cache"
+# Beim Archivieren mit entfernte, jederzeit neu erzeugbare Dateien
+DISPOSABLE_FOLDERS = (".upload_cache", EXTRACT_FOLDER)
+
+
+def archive_path(training_folder):
+    return os.path.join(training_folder, ARCHIVE_FILE)
+
+
+def is_archived(training_folder):
+    return os.path.isfile(archive_path(training_folder))
+
+
+def list_screenshot_files(screenshot_folder):
+    if not os.path.isdir(screenshot_folder):
+        return []
+    with os.scandir(screenshot_folder) as entries:
+        return [entry for entry in entries if is_screenshot_file(entry.name) and entry.is_file()]
+
+
+class TrainingArchive:
+    """
+    Lesezugriff auf screenshots.zip eines Trainings. Das Manifest liefert
+    Größe, mtime und Aufnahmezeitpunkt jedes Bildes, ohne es zu entpacken.
+    Mehrere Threads (Vorschaubild-Loader) dürfen gleichzeitig lesen.
+    """
+
+    def __init__(self, training_folder):
+        self.path = archive_path(training_folder)
+        self._zip = zipfile.ZipFile(self.path)
+        self._lock = threading.Lock()
+        manifest = json.loads(self._zip.read(MANIFEST_NAME))
+        self.training_id = manifest.get("training_id")
+        self.entries = {entry["filename"]: entry for entry in manifest["screenshots"]}
+
+    def __contains__(self, filename):
+        return filename in self.entries
+
+    def stat(self, filename):
+        """
+        (mtime_ns, size) des archivierten Originals, None wenn nicht im Archiv.
+        """
+        entry = self.entries.get(filename)
+        return (entry["mtime_ns"], entry["size"]) if entry else None
+
+    def capture_times(self):
+        return {filename: datetime.fromisoformat(entry["captured_at"]) for filename, entry in self.entries.items()}
+
+    def read(self, filename):
+        with self._lock:
+            return self._zip.read(MEMBER_FOLDER + filename)
+
+    def open(self, filename):
+        # PIL braucht eine Datei mit seek(), daher als BytesIO
+        return io.BytesIO(self.read(filename))
+
+    def extract(self, filename, target_folder):
+        """
+        Entpackt ein einzelnes Bild nach target_folder und gibt den Pfad zurück.
+        """
+        target_path = os.path.join(target_folder, filename)
+        if not os.path.exists(target_path):
+            os.makedirs(target_folder, exist_ok=True)
+            temp_path = f"{target_path}.part"
+            with open(temp_path, "wb") as f:
+                f.write(self.read(filename))
+            os.replace(temp_path, target_path)
+        return target_path
+
+    def close(self):
+        self._zip.close()
+
+
+def newest_mtime(screenshot_files):
+    return max((entry.stat().st_mtime for entry in screenshot_files), default=None)
+
+
+def find_archivable_trainings(trainee_folder, older_than_days=DEFAULT_ARCHIVE_AFTER_DAYS, trainee=None, exclude=()):
+    """
+    Trainingsordner, deren neuester Screenshot älter als older_than_days ist.
+    exclude: Ordner, die gerade benutzt werden (laufende oder geöffnete Trainings).
+    """
+    cutoff = time.time() - older_than_days * 86400
+    excluded = {os.path.normpath(folder) for folder in exclude if folder}
+    if trainee:
+        trainees = [trainee]
+    else:
+        with os.scandir(trainee_folder) as entries:
+            trainees = sorted(entry.name for entry in entries if entry.is_dir())
+    found = []
+    for trainee_name in trainees:
+        trainee_path = os.path.join(trainee_folder, trainee_name)
+        with os.scandir(trainee_path) as entries:
+            trainings = sorted(entry.path for entry in entries if entry.is_dir())
+        for training_folder in trainings:
+            if os.path.normpath(training_folder) in excluded:
+                continue
+            newest = newest_mtime(list_screenshot_files(os.path.join(training_folder, "screenshots")))
+            if newest is not None and newest < cutoff:
+                found.append(training_folder)
+    return found
+
+
+def archive_training(training_folder):
+    """
+    Packt die Screenshots eines Trainings in screenshots.zip und entfernt die
+    Originale erst, nachdem das Archiv geprüft wurde. Kommen später neue
+    Screenshots hinzu, werden sie beim nächsten Archivieren ergänzt.
+    Gibt (Anzahl Bilder, freigegebene Bytes) zurück.
+    """
+    # PIL nur hier laden: Vorschaubilder müssen vor dem Entfernen der Originale existieren
+    from thumbnail_cache import ThumbnailCache
+    from upload_engine import hash_file
+
+    screenshot_folder = os.path.join(training_folder, "screenshots")
+    files = list_screenshot_files(screenshot_folder)
+    if not files:
+        return 0, 0
+
+    store = TrainingStore(training_folder)
+    try:
+        comments = store.load_comments()
+        capture_times, _ = store.get_capture_times()
+        training_id = store.get_meta("training_id")
+    finally:
+        store.close()
+
+    previous = TrainingArchive(training_folder) if is_archived(training_folder) else None
+    entries = dict(previous.entries) if previous else {}
+    thumbnail_cache = ThumbnailCache(screenshot_folder)
+    for entry in files:
+        stat = entry.stat()
+        thumbnail_cache.get(entry.path)
+        entries[entry.name] = {
+            "filename": entry.name,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "captured_at": screenshot_timestamp(screenshot_folder, entry.name, capture_times).isoformat(),
+            "content_hash": hash_file(entry.path),
+        }
+
+    manifest = {
+        "version": ARCHIVE_VERSION,
+        "training_id": training_id,
+        "trainee": os.path.basename(os.path.dirname(os.path.normpath(training_folder))),
+        "training": os.path.basename(os.path.normpath(training_folder)),
+        "archived_at": datetime.now().isoformat(),
+        "screenshots": sorted(entries.values(), key=lambda item: (item["captured_at"], item["filename"])),
+    }
+    comments_json = {
+        "comments": comments.get("comments", {}),
+        "besprochen": sorted(comments.get("besprochen", [])),
+        "live": comments.get("live", ""),
+    }
+
+    target_path = archive_path(training_folder)
+    temp_path = f"{target_path}.part"
+    on_disk = {entry.name: entry.path for entry in files}
+    try:
+        with zipfile.ZipFile(temp_path, "w") as archive:
+            for filename in entries:
+                # Bilder sind schon komprimiert, erneutes Deflate kostet nur Zeit
+                if filename in on_disk:
+                    archive.write(on_disk[filename], MEMBER_FOLDER + filename, compress_type=zipfile.ZIP_STORED)
+                else:
+                    archive.writestr(MEMBER_FOLDER + filename, previous.read(filename), zipfile.ZIP_STORED)
+            archive.writestr(COMMENTS_NAME, json.dumps(comments_json, ensure_ascii=False, indent=2),
+                             zipfile.ZIP_DEFLATED)
+            archive.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2), zipfile.ZIP_DEFLATED)
+        with zipfile.ZipFile(temp_path) as archive:
+            broken = archive.testzip()
+        if broken:
+            raise OSError(f"Archiv fehlerhaft: {broken}")
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        if previous:
+            previous.close()
+    os.replace(temp_path, target_path)
+
+    freed = 0
+    for entry in files:
+        freed += entry.stat().st_size
+        os.remove(entry.path)
+    for folder in DISPOSABLE_FOLDERS:
+        shutil.rmtree(os.path.join(screenshot_folder, folder), ignore_errors=True)
+
+    store = TrainingStore(training_folder)
+    try:
+        store.set_meta("archived_at", manifest["archived_at"])
+    finally:
+        store.close()
+    return len(files), freed
+
+
+def restore_training(training_folder):
+    """
+    Entpackt ein archiviertes Training wieder vollständig. Größe und mtime der
+    Originale bleiben erhalten, damit Vorschaubilder und Upload-Ledger gültig
+    bleiben. Gibt die Anzahl der Bilder zurück.
+    """
+    screenshot_folder = os.path.join(training_folder, "screenshots")
+    archive = TrainingArchive(training_folder)
+    try:
+        for filename, entry in archive.entries.items():
+            target_path = os.path.join(screenshot_folder, filename)
+            if os.path.exists(target_path):
+                continue
+            temp_path = f"{target_path}.part"
+            with open(temp_path, "wb") as f:
+                f.write(archive.read(filename))
+            os.utime(temp_path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+            os.replace(temp_path, target_path)
+        count = len(archive.entries)
+    finally:
+        archive.close()
+    os.remove(archive_path(training_folder))
+    shutil.rmtree(os.path.join(screenshot_folder, EXTRACT_FOLDER), ignore_errors=True)
+
+    store = TrainingStore(training_folder)
+    try:
+        store.set_meta("archived_at", "")
+    finally:
+        store.close()
+    return count
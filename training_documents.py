@@ -0,0 +1,172 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+TEMPLATE_PATH = os.path.join("templates", "training_template.docx")
+DOC_SUFFIX = "_training_notes.docx"
+PLACEHOLDERS = ("{Name}", "{Training}", "{Date}")
+
+
+def iter_paragraphs(doc):
+    """
+    Alle Absätze im Haupttext, in (auch verschachtelten) Tabellen sowie in
+    Kopf- und Fußzeilen. Verknüpfte Kopfzeilen werden nur einmal geliefert.
+    """
+    seen = set()
+
+    def from_container(container):
+        for paragraph in container.paragraphs:
+            if id(paragraph._p) not in seen:
+                seen.add(id(paragraph._p))
+                yield paragraph
+        for table in container.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    yield from from_container(cell)
+
+    yield from from_container(doc)
+    for section in doc.sections:
+        for part in (
+            section.header, section.first_page_header, section.even_page_header,
+            section.footer, section.first_page_footer, section.even_page_footer,
+        ):
+            if not part.is_linked_to_previous:
+                yield from from_container(part)
+
+
+def replace_in_paragraph(paragraph, values):
+    """
+    Ersetzt Platzhalter direkt in den Runs, damit deren Formatierung erhalten
+    bleibt. Ein Platzhalter, den Word über mehrere Runs verteilt hat, landet im
+    ersten beteiligten Run. Gibt [(run, alter Text)] zum Zurücksetzen zurück.
+    """
+    runs = paragraph.runs
+    texts = [run.text for run in runs]
+    full_text = "".join(texts)
+    changed = {}
+
+    search_from = 0
+    while True:
+        matches = [(full_text.find(key, search_from), key) for key in values]
+        matches = [(pos, key) for pos, key in matches if pos >= 0]
+        if not matches:
+            break
+        start, key = min(matches)
+        end = start + len(key)
+
+        # Zeichenbereich [start, end) auf die Runs abbilden
+        offset = 0
+        first = True
+        for index, text in enumerate(texts):
+            run_start, run_end = offset, offset + len(text)
+            offset = run_end
+            if run_end <= start or run_start >= end:
+                continue
+            cut_start = max(start, run_start) - run_start
+            cut_end = min(end, run_end) - run_start
+            replacement = values[key] if first else ""
+            texts[index] = text[:cut_start] + replacement + text[cut_end:]
+            changed[index] = True
+            first = False
+        full_text = "".join(texts)
+        search_from = start + len(values[key])
+
+    originals = []
+    for index in changed:
+        originals.append((runs[index], runs[index].text))
+        runs[index].text = texts[index]
+    return originals
+
+
+class TrainingDocumentGenerator:
+    """
+    Erzeugt die Trainingsnotizen aus der Word-Vorlage im Hintergrund.
+
+    Die Vorlage wird nur einmal eingelesen (erneut nur, wenn sich die Datei
+    ändert); beim Einlesen werden die Absätze mit Platzhaltern vorgemerkt. Für
+    jedes Dokument werden nur diese Runs ersetzt, gespeichert und danach wieder
+    auf den Vorlagentext zurückgesetzt. Ein einzelner Worker-Thread verhindert,
+    dass zwei Aufträge das geteilte Dokument gleichzeitig verändern.
+    """
+
+    def __init__(self, template_path=TEMPLATE_PATH):
+        self.template_path = template_path
+        self._template = None
+        self._template_mtime = None
+        self._placeholder_paragraphs = []
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._lock = threading.Lock()
+
+    def _load_template(self):
+        mtime = os.stat(self.template_path).st_mtime_ns
+        if self._template is None or mtime != self._template_mtime:
+            # python-docx erst im Worker-Thread laden
+            from docx import Document
+
+            self._template = Document(self.template_path)
+            self._template_mtime = mtime
+            self._placeholder_paragraphs = [
+                paragraph for paragraph in iter_paragraphs(self._template)
+                if "{" in paragraph.text
+            ]
+        return self._template
+
+    def render(self, doc_path, values):
+        """
+        Schreibt ein Dokument mit den ersetzten Platzhaltern. Läuft im Worker-Thread.
+        """
+        with self._lock:
+            template = self._load_template()
+            originals = []
+            try:
+                for paragraph in self._placeholder_paragraphs:
+                    originals.extend(replace_in_paragraph(paragraph, values))
+                temp_path = f"{doc_path}.part"
+                template.save(temp_path)
+                os.replace(temp_path, doc_path)
+            finally:
+                for run, text in originals:
+                    run.text = text
+        return doc_path
+
+    def generate(self, training_folder, trainee_name, training_name, date=None):
+        """
+        Startet die Erzeugung der Notizen eines Trainings, gibt ein Future mit dem Pfad zurück.
+        """
+        values = {
+            "{Name}": trainee_name,
+            "{Training}": training_name,
+            "{Date}": (date or datetime.now()).strftime("%Y-%m-%d"),
+        }
+        doc_path = os.path.join(training_folder, f"{training_name}{DOC_SUFFIX}")
+        return self._executor.submit(self.render, doc_path, values)
+
+    def generate_for_trainee(self, trainee_path, overwrite=False):
+        """
+        Erzeugt in einem Durchlauf die Notizen für alle Trainings eines Trainees.
+        Bestehende Dokumente bleiben ohne overwrite unverändert. Das Future
+        liefert die Liste der geschriebenen Pfade.
+        """
+        return self._executor.submit(self._generate_all, trainee_path, overwrite)
+
+    def _generate_all(self, trainee_path, overwrite):
+        trainee_name = os.path.basename(os.path.normpath(trainee_path))
+        written = []
+        with os.scandir(trainee_path) as entries:
+            trainings = sorted((entry for entry in entries if entry.is_dir()), key=lambda entry: entry.name)
+        for entry in trainings:
+            doc_path = os.path.join(entry.path, f"{entry.name}{DOC_SUFFIX}")
+            if not overwrite and os.path.exists(doc_path):
+                continue
+            # Datum des Trainings: Erstellungszeit des Ordners
+            date = datetime.fromtimestamp(entry.stat().st_ctime)
+            values = {"{Name}": trainee_name, "{Training}": entry.name, "{Date}": date.strftime("%Y-%m-%d")}
+            try:
+                written.append(self.render(doc_path, values))
+            except Exception as e:
+                print(f"Fehler beim Erzeugen des Dokuments für {entry.name}: {e}")
+        return written
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
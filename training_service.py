@@ -0,0 +1,322 @@
+import os
+import threading
+
+from api_client import post_upload, post_upload_check
+from instrumentation import instrumented
+from screenshot_index import ScreenshotIndex
+from screenshot_ingestion import screenshot_content_type, screenshot_timestamp
+from training_archive import EXTRACT_FOLDER, TrainingArchive, is_archived
+from training_store import TrainingStore
+from upload_engine import UploadEngine, create_session, hash_file
+
+
+class TrainingService:
+    """
+    GUI-freier Kern eines einzelnen Trainings: Screenshots, Bemerkungen,
+    Aufnahmezeitpunkte und Debrief-Uploads. Wird vom ScreenshotManager und
+    von der Kommandozeile (cli.py) gleichermaßen genutzt.
+
+    store gehört dem erzeugenden Thread; Upload-Threads öffnen eigene
+    Verbindungen. Eine übergebene session wird nicht geschlossen; ohne
+    session entsteht eine eigene erst beim ersten Zugriff auf den Server.
+
+    Bei archivierten Trainings liest archive die Bilder bei Bedarf einzeln
+    aus screenshots.zip; sie sind dann nur lesbar.
+    """
+
+    def __init__(self, base_folder, training_id, api_base_url, upload_mode="stream", session=None,
+                 transcoder=None, outbox=None):
+        self.base_folder = base_folder
+        self.training_id = training_id
+        self.api_base_url = api_base_url
+        self.upload_mode = upload_mode  # "stream", "multipart" oder "json" (Base64, altes Format)
+        self.transcoder = transcoder  # None = Original hochladen
+        self.outbox = outbox  # Dauerhafte Warteschlange für fehlgeschlagene API-Vorgänge
+        self.owns_session = session is None
+        self._session = session
+        self._session_lock = threading.Lock()
+        self._upload_mode_lock = threading.Lock()
+        self.screenshot_folder = os.path.join(base_folder, "screenshots")
+        self.store = TrainingStore(base_folder)
+        self.index = ScreenshotIndex(self.screenshot_folder)
+        self.archive = TrainingArchive(base_folder) if is_archived(base_folder) else None
+        self.comments = {}
+        self.capture_times = {}
+        self.capture_index_id = 0
+        self.content_hashes = {}  # (Pfad, Größe, mtime_ns) -> BLAKE2b-Hash
+
+        os.makedirs(self.screenshot_folder, exist_ok=True)
+
+        self.load_screenshots()
+        self.load_comments()
+
+    @property
+    def session(self):
+        with self._session_lock:
+            if self._session is None:
+                self._session = create_session()
+            return self._session
+
+    def close(self):
+        self.store.close()
+        self.close_archive()
+        if self.owns_session and self._session is not None:
+            self._session.close()
+
+    # Screenshots und Bemerkungen
+    @property
+    def screenshots(self):
+        # Nach Aufnahmezeitpunkt sortiert; nur im besitzenden Thread verändern
+        return self.index.paths
+
+    @property
+    def last_screenshot_path(self):
+        return self.index.latest
+
+    @instrumented("training.load_screenshots")
+    def load_screenshots(self):
+        """
+        Liest den Screenshot-Ordner vollständig neu ein (nur auf ausdrücklichen Wunsch).
+        """
+        self.load_capture_times()
+        archived = self.archive.capture_times() if self.archive else {}
+        for filename, captured_at in archived.items():
+            archived[filename] = self.capture_times.get(filename, captured_at)
+        self.index.rescan(self.capture_times, archived)
+
+    def add_screenshots(self, paths):
+        """
+        Übernimmt frisch eingegangene Screenshots in den Index. Pfade anderer
+        Trainings werden ignoriert. Gibt die Anzahl übernommener Dateien zurück.
+        """
+        self.load_capture_times()
+        added = 0
+        for path in paths:
+            if os.path.normpath(os.path.dirname(path)) != os.path.normpath(self.screenshot_folder):
+                continue
+            if not os.path.isfile(path):
+                continue
+            filename = os.path.basename(path)
+            self.index.add(filename, self.get_screenshot_timestamp(filename))
+            added += 1
+        return added
+
+    def is_archived_screenshot(self, screenshot_path):
+        return (
+            self.archive is not None
+            and os.path.basename(screenshot_path) in self.archive
+            and not os.path.exists(screenshot_path)
+        )
+
+    def stat_screenshot(self, screenshot_path):
+        """
+        (Größe, mtime_ns) des Originals; bei archivierten Screenshots aus dem Manifest.
+        """
+        if self.is_archived_screenshot(screenshot_path):
+            mtime_ns, size = self.archive.stat(os.path.basename(screenshot_path))
+            return size, mtime_ns
+        stat = os.stat(screenshot_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def local_path(self, screenshot_path):
+        """
+        Pfad einer echten Datei für externe Programme; archivierte Bilder werden
+        dafür einzeln entpackt (Änderungen daran fließen nicht ins Archiv zurück).
+        """
+        if not self.is_archived_screenshot(screenshot_path):
+            return screenshot_path
+        return self.archive.extract(
+            os.path.basename(screenshot_path), os.path.join(self.screenshot_folder, EXTRACT_FOLDER)
+        )
+
+    def close_archive(self):
+        if self.archive:
+            self.archive.close()
+            self.archive = None
+
+    def forget_screenshot(self, screenshot_path):
+        """
+        Entfernt eine außerhalb der App gelöschte Datei aus dem Index.
+        """
+        return self.index.remove(os.path.basename(screenshot_path))
+
+    def load_comments(self):
+        self.comments = self.store.load_comments()
+
+    def load_capture_times(self):
+        # Nur seit dem letzten Aufruf neu hinzugekommene Einträge lesen
+        records, self.capture_index_id = self.store.get_capture_times(self.capture_index_id)
+        self.capture_times.update(records)
+
+    def get_screenshot_timestamp(self, filename):
+        return screenshot_timestamp(self.screenshot_folder, filename, self.capture_times)
+
+    @instrumented("comment.save")
+    def set_comment(self, filename, comment):
+        # Bemerkung speichern (ein einzelnes Update im Index)
+        self.comments["comments"][filename] = comment
+        self.store.set_comment(filename, comment)
+
+    @instrumented("screenshot.delete")
+    def delete_screenshot(self, screenshot_path):
+        filename = os.path.basename(screenshot_path)
+        if self.is_archived_screenshot(screenshot_path):
+            raise PermissionError(f"{filename} ist archiviert und kann nicht gelöscht werden.")
+        os.remove(screenshot_path)
+        self.index.remove(filename)
+        self.store.remove_screenshot(filename)
+        self.comments["comments"].pop(filename, None)
+        if self.outbox:
+            # Ausstehende Uploads dieses Screenshots (jeder Inhalts-Hash) sind hinfällig
+            self.outbox.discard_prefix(f"upload:{self.training_id}:{filename}:")
+
+    def mark_live(self, filename):
+        self.comments["live"] = filename
+        self.comments["besprochen"].add(filename)
+        self.store.mark_live(filename)
+
+    # Debrief-Uploads
+    def get_pending_uploads(self):
+        """
+        Screenshots, die für diese Training-ID noch nicht (oder seitdem verändert) hochgeladen wurden.
+        Archivierte Screenshots zählen mit, Größe und mtime stammen dann aus dem Manifest.
+        """
+        ledger = self.store.get_uploads(self.training_id)
+        pending = []
+        for screenshot_path in self.screenshots:
+            entry = ledger.get(os.path.basename(screenshot_path))
+            try:
+                file_stat = self.stat_screenshot(screenshot_path)
+            except OSError:
+                continue
+            if entry is None or entry[1:] != file_stat:
+                pending.append(screenshot_path)
+        return pending
+
+    def create_upload_engine(self):
+        return UploadEngine(self.upload_screenshot, precheck_func=self.precheck_uploads)
+
+    def upload_all(self, on_progress=None):
+        """
+        Lädt alle ausstehenden Screenshots hoch und wartet auf das Ende (für die
+        Kommandozeile). on_progress(path, success) wird pro Datei aufgerufen.
+        Gibt (hochgeladen, fehlgeschlagen, abgebrochen) zurück.
+        """
+        engine = self.create_upload_engine()
+        engine.start(self.get_pending_uploads())
+        try:
+            while True:
+                event = engine.events.get()
+                if event[0] == "progress" and on_progress:
+                    on_progress(event[1], event[2])
+                elif event[0] == "finished":
+                    return event[1:]
+        except KeyboardInterrupt:
+            engine.cancel()
+            raise
+
+    def get_content_hash(self, screenshot_path):
+        """
+        (Inhalts-Hash, (Größe, mtime_ns)); bei archivierten Screenshots aus dem Manifest.
+        """
+        if self.is_archived_screenshot(screenshot_path):
+            filename = os.path.basename(screenshot_path)
+            return self.archive.entries[filename]["content_hash"], self.stat_screenshot(screenshot_path)
+        file_stat = self.stat_screenshot(screenshot_path)
+        key = (screenshot_path, *file_stat)
+        content_hash = self.content_hashes.get(key)
+        if content_hash is None:
+            content_hash = hash_file(screenshot_path)
+            self.content_hashes[key] = content_hash
+        return content_hash, file_stat
+
+    def record_upload_ack(self, screenshot_path, content_hash, file_stat):
+        # Läuft in Upload-Threads, daher eigene Verbindung zum Trainings-Index
+        size, mtime_ns = file_stat
+        store = TrainingStore(self.base_folder)
+        try:
+            store.record_upload(self.training_id, os.path.basename(screenshot_path), content_hash, size, mtime_ns)
+        finally:
+            store.close()
+
+    def precheck_uploads(self, paths):
+        """
+        Fragt den Server, welche Inhalte (per Hash) er schon hat. Diese werden ohne
+        Upload als bestätigt im Ledger vermerkt. Ältere Server ohne /upload/check
+        liefern einen Fehlerstatus, dann wird einfach alles hochgeladen.
+        """
+        hashes = {path: self.get_content_hash(path) for path in paths}
+        files = [
+            {"filename": os.path.basename(path), "hash": content_hash}
+            for path, (content_hash, _) in hashes.items()
+        ]
+        known = post_upload_check(self.session, self.api_base_url, self.training_id, files)
+        already_uploaded = set()
+        for path, (content_hash, file_stat) in hashes.items():
+            if content_hash in known:
+                self.record_upload_ack(path, content_hash, file_stat)
+                already_uploaded.add(path)
+        return already_uploaded
+
+    def upload_screenshot(self, screenshot_path):
+        filename = os.path.basename(screenshot_path)
+        metadata = {
+            "filename": filename,
+            "comment": self.comments.get("comments", {}).get(filename, ""),
+            "timestamp": self.get_screenshot_timestamp(filename).isoformat(),
+        }
+
+        try:
+            content_hash, file_stat = self.get_content_hash(screenshot_path)
+            metadata["content_hash"] = content_hash
+
+            # Archivierte Bilder werden dafür einzeln entpackt
+            source_path = self.local_path(screenshot_path)
+            # Optional verkleinerte/neu kodierte Fassung, der Hash bezieht sich weiter aufs Original
+            upload_path, content_type = source_path, screenshot_content_type(source_path)
+            if self.transcoder:
+                upload_path, content_type = self.transcoder.prepare(source_path, content_hash)
+            metadata["content_type"] = content_type
+
+            with self._upload_mode_lock:
+                upload_mode = self.upload_mode
+
+            # Erst in der Outbox vermerken, damit der Upload auch nach einem Absturz nachgeholt wird
+            idempotency_key = f"upload:{self.training_id}:{filename}:{content_hash}"
+            payload = {
+                "api_base_url": self.api_base_url,
+                "training_id": self.training_id,
+                "base_folder": self.base_folder,
+                "upload_path": upload_path,
+                "upload_mode": upload_mode,
+                "metadata": metadata,
+                "size": file_stat[0],
+                "mtime_ns": file_stat[1],
+            }
+            if self.outbox:
+                # Wiederholungen der Upload-Engine setzen Fehlversuche und Backoff nicht zurück
+                self.outbox.put_if_absent(idempotency_key, "upload", payload)
+
+            response, used_mode = post_upload(
+                self.session, self.api_base_url, self.training_id, upload_path, metadata,
+                upload_mode, idempotency_key,
+            )
+            if used_mode != upload_mode:
+                # Alter Server: für diese Sitzung auf JSON/Base64 zurückfallen. Nur der
+                # Rückfall wird geschrieben, ein parallel erfolgreicher Binär-Upload
+                # überschreibt ihn also nicht.
+                with self._upload_mode_lock:
+                    self.upload_mode = used_mode
+
+            if response.status_code == 200:
+                print(f"Screenshot hochgeladen: {filename}")
+                self.record_upload_ack(screenshot_path, content_hash, file_stat)
+                if self.outbox:
+                    self.outbox.done(idempotency_key)
+                return True
+            else:
+                print(f"Fehler beim Hochladen von {filename}: {response.status_code}")
+                return False
+        except Exception as e:
+            print(f"Fehler beim Hochladen von {filename}: {e}")
+            return False
@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+STORE_FILE = "training.db"
+LEGACY_COMMENTS_FILE = "comments.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS screenshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL UNIQUE,
+    captured_at TEXT,
+    comment TEXT NOT NULL DEFAULT '',
+    besprochen INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS uploads (
+    training_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    acknowledged_at TEXT NOT NULL,
+    PRIMARY KEY (training_id, filename)
+);
+"""
+
+
+class TrainingStore:
+    """
+    SQLite-Index (WAL) eines Trainings: Screenshots, Bemerkungen, Besprochen-Status,
+    Live-Zeiger und Aufnahmezeitpunkte. Jede Änderung ist ein einzelnes, transaktionales
+    Update statt eines kompletten Neuschreibens von comments.json.
+
+    Eine Instanz gehört zu genau einem Thread; andere Threads öffnen eine eigene.
+    """
+
+    def __init__(self, base_folder):
+        self.base_folder = base_folder
+        self.db_path = os.path.join(base_folder, STORE_FILE)
+        self.conn = sqlite3.connect(self.db_path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+        self.import_legacy_files()
+
+    def close(self):
+        self.conn.close()
+
+    # ------------------------------
+    # Lesen
+    # ------------------------------
+    def load_comments(self):
+        """
+        Liefert den Stand im Format des alten comments.json, "besprochen" jedoch als set.
+        """
+        comments = {}
+        besprochen = set()
+        for filename, comment, is_besprochen in self.conn.execute(
+            "SELECT filename, comment, besprochen FROM screenshots"
+        ):
+            if comment:
+                comments[filename] = comment
+            if is_besprochen:
+                besprochen.add(filename)
+        return {"comments": comments, "besprochen": besprochen, "live": self.get_meta("live", "")}
+
+    def get_capture_times(self, since_id=0):
+        """
+        Aufnahmezeitpunkte aller Einträge mit id > since_id. Gibt ({Dateiname: datetime}, höchste id) zurück.
+        """
+        records = {}
+        last_id = since_id
+        for row_id, filename, captured_at in self.conn.execute(
+            "SELECT id, filename, captured_at FROM screenshots WHERE id > ? ORDER BY id", (since_id,)
+        ):
+            last_id = row_id
+            if captured_at:
+                records[filename] = datetime.fromisoformat(captured_at)
+        return records, last_id
+
+    def get_uploads(self, training_id):
+        """
+        Upload-Ledger: vom Server bestätigte Dateien dieser Training-ID als
+        {Dateiname: (content_hash, size, mtime_ns)}.
+        """
+        return {
+            filename: (content_hash, size, mtime_ns)
+            for filename, content_hash, size, mtime_ns in self.conn.execute(
+                "SELECT filename, content_hash, size, mtime_ns FROM uploads WHERE training_id = ?", (training_id,)
+            )
+        }
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    # ------------------------------
+    # Schreiben
+    # ------------------------------
+    def record_capture(self, filename, captured_at):
+        with self.conn:
+            self._upsert(filename, "captured_at", captured_at.isoformat())
+
+    def set_comment(self, filename, comment):
+        with self.conn:
+            self._upsert(filename, "comment", comment)
+
+    def mark_live(self, filename):
+        """
+        Setzt den Live-Zeiger und markiert den Screenshot als besprochen (eine Transaktion).
+        """
+        with self.conn:
+            self._upsert(filename, "besprochen", 1)
+            self._set_meta("live", filename)
+
+    def record_upload(self, training_id, filename, content_hash, size, mtime_ns):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO uploads (training_id, filename, content_hash, size, mtime_ns, acknowledged_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(training_id, filename) DO UPDATE SET "
+                "content_hash = excluded.content_hash, size = excluded.size, mtime_ns = excluded.mtime_ns, "
+                "acknowledged_at = excluded.acknowledged_at",
+                (training_id, filename, content_hash, size, mtime_ns, datetime.now().isoformat()),
+            )
+
+    def add_duration(self, seconds):
+        with self.conn:
+            total = float(self.get_meta("duration_seconds", 0)) + seconds
+            self._set_meta("duration_seconds", total)
+
+    def remove_screenshot(self, filename):
+        with self.conn:
+            self.conn.execute("DELETE FROM screenshots WHERE filename = ?", (filename,))
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self._set_meta(key, value)
+
+    def _upsert(self, filename, column, value):
+        # column stammt immer aus dem Code, nie aus Benutzereingaben
+        self.conn.execute(
+            f"INSERT INTO screenshots (filename, {column}) VALUES (?, ?) "
+            f"ON CONFLICT(filename) DO UPDATE SET {column} = excluded.{column}",
+            (filename, value),
+        )
+
+    def _set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    # ------------------------------
+    # Einmaliger Import
+    # ------------------------------
+    def import_legacy_files(self):
+        """
+        Übernimmt einmalig comments.json. Die alte Datei bleibt unverändert liegen.
+        """
+        if self.get_meta("legacy_imported"):
+            return
+
+        legacy = {}
+        comments_file = os.path.join(self.base_folder, LEGACY_COMMENTS_FILE)
+        if os.path.exists(comments_file):
+            try:
+                with open(comments_file, "r") as f:
+                    legacy = json.load(f)
+            except Exception as e:
+                print(f"Fehler beim Lesen von {comments_file}: {e}")
+
+        with self.conn:
+            for filename, comment in legacy.get("comments", {}).items():
+                self._upsert(filename, "comment", comment)
+            for filename in legacy.get("besprochen", []):
+                self._upsert(filename, "besprochen", 1)
+            self._set_meta("live", legacy.get("live", ""))
+            self._set_meta("legacy_imported", datetime.now().isoformat())
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_UPLOAD_WORKERS = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """
+    BLAKE2b-Inhaltshash der Datei, blockweise gelesen.
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def create_session(pool_size=DEFAULT_UPLOAD_WORKERS):
+    """
+    Erstellt eine requests.Session mit Keep-Alive-Verbindungspool,
+    damit nicht jeder Upload eine neue TCP/HTTP-Verbindung aufbaut.
+    """
+    # requests erst bei der ersten Verbindung laden, nicht beim Programmstart
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class UploadEngine:
+    """
+    Lädt Screenshots im Hintergrund mit einem begrenzten Worker-Pool hoch.
+
+    precheck_func(paths) läuft optional vorab im Hintergrund und liefert die
+    Pfade, die der Server bereits hat; diese gelten ohne Upload als erfolgreich.
+
+    Fortschritt wird über eine thread-sichere Queue gemeldet, die der
+    Tk-Thread per after() abfragt:
+        ("progress", path, success)
+        ("finished", uploaded, failed, cancelled)
+    """
+
+    def __init__(self, upload_func, max_workers=DEFAULT_UPLOAD_WORKERS,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF, precheck_func=None):
+        self.upload_func = upload_func
+        self.precheck_func = precheck_func
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self._thread = None
+
+    def start(self, paths):
+        self._thread = threading.Thread(target=self._run, args=(list(paths),), daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def _run(self, paths):
+        uploaded = []
+        failed = []
+        if self.precheck_func and paths:
+            try:
+                already_uploaded = self.precheck_func(paths)
+            except Exception as e:
+                print(f"Fehler beim Abgleich mit dem Server: {e}")
+                already_uploaded = set()
+            for path in already_uploaded:
+                uploaded.append(path)
+                self.events.put(("progress", path, True))
+            paths = [path for path in paths if path not in already_uploaded]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._upload_with_retry, path): path for path in paths}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    success = future.result()
+                except Exception as e:
+                    print(f"Fehler beim Hochladen von {os.path.basename(path)}: {e}")
+                    success = False
+                (uploaded if success else failed).append(path)
+                self.events.put(("progress", path, success))
+        self.events.put(("finished", uploaded, failed, self.cancelled))
+
+    def _upload_with_retry(self, path):
+        for attempt in range(self.max_retries + 1):
+            if self.cancelled:
+                return False
+            if self.upload_func(path):
+                return True
+            if attempt < self.max_retries:
+                # Exponentielles Backoff, durch Abbrechen sofort unterbrechbar
+                self.cancel_event.wait(self.backoff * (2 ** attempt))
+        return False
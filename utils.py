@@ -1,5 +1,6 @@
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 CONFIG_FILE = "config.json"
 
@@ -12,6 +13,15 @@ def load_config():
     except:
         return {}
 
+def load_config_async():
+    """
+    Liest die Konfiguration im Hintergrund, während der Start weiterläuft. Gibt ein Future zurück.
+    """
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(load_config)
+    executor.shutdown(wait=False)
+    return future
+
 def save_config(config):
     try:
         with open(CONFIG_FILE, "w", encoding="utf-8") as f: